@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the public functions of pyelabdata against a local stand-in
+for the eLabFTW server (see mock_server.py).
+
+For each function the median time of a call with empty caches ('cold')
+and with filled caches ('warm'), the number of requests to the server
+and bytes received per cold call and the peak memory allocated by a cold
+call (measured with tracemalloc) are reported.
+
+The results can be saved with --save and compared with a saved run with
+--compare; the script exits with status 1 if a function needs more
+requests than before or if its cold time or peak memory grew by more
+than the factor --tolerance.
+
+Usage: python benchmarks/bench_api.py [--latency s] [--rows n]
+       [--file-size MB] [--experiments n] [--repeat n]
+       [--save results.json] [--compare results.json] [--tolerance f]
+"""
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import h5py
+
+# benchmark the checkout this script belongs to, not an installed release
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pyelabdata as eln
+
+from mock_server import MockELabFTW
+
+
+def make_body(rows: int):
+    cells = ''.join('<tr><td>%d</td><td>%.4f</td><td>%.2f</td></tr>'
+                    % (i, i / 7, i * 1.1) for i in range(rows))
+    return ('<h2>Run</h2><table><tr><td>n</td><td>x</td><td>y</td></tr>'
+            '%s</table>' % cells)
+
+
+def make_csv(rows: int):
+    return ('n,x,y\n' + ''.join('%d,%.4f,%.2f\n' % (i, i / 7, i * 1.1)
+                                for i in range(rows))).encode()
+
+
+def make_hdf5(size: int):
+    buffer = io.BytesIO()
+    with h5py.File(buffer, 'w') as f:
+        f['data'] = np.arange(max(size // 8, 1), dtype=float)
+    return buffer.getvalue()
+
+
+def setup_server(mock: MockELabFTW, args):
+    extra_fields = {'field%d' % i: {'type': 'number', 'value': str(i)}
+                    for i in range(20)}
+    expid = mock.add_experiment('benchmark', make_body(args.rows),
+                                {'extra_fields': extra_fields},
+                                tags=['benchmark'])
+    mock.add_upload(expid, 'data.csv', make_csv(args.rows))
+    mock.add_upload(expid, 'data.h5', make_hdf5(int(args.file_size * 1e6)))
+    for i in range(args.experiments - 1):
+        mock.add_experiment('experiment %d' % i, '<p>%d</p>' % i,
+                            {'extra_fields': {}})
+    return expid
+
+
+def cases(mock: MockELabFTW, expid: int):
+    # (name, function, cleanup after each call)
+    def hdf5(access):
+        def read():
+            with eln.get_file_hdf5_data('data.h5', access=access,
+                                        expid=expid) as f:
+                return f['data'][-10:]
+        return read
+
+    def upload(retry: bool):
+        def post():
+            data = b'x' * 100000
+            if retry:
+                # the first attempt is rejected, the upload is repeated
+                mock.fail_next.append((429, {'Retry-After': '0'}))
+            eln.upload_bytes(data, 'upload.bin', 'benchmark', expid=expid)
+            upload = [u for u in mock.uploads[expid] if u['state'] == 1][-1]
+            assert upload['real_name'] == 'upload.bin'
+            assert mock.files[upload['id']] == data
+        return post
+
+    counter = iter(range(10**9))
+    return [
+        ('list_experiments',
+         lambda: eln.list_experiments(tags=['benchmark']), None),
+        ('list_experiments (all)',
+         lambda: eln.list_experiments(list_keys=['id', 'title']), None),
+        ('get_table_data',
+         lambda: eln.get_table_data(0, expid=expid), None),
+        ("get_table_data (engine='native')",
+         lambda: eln.get_table_data(0, engine='native', expid=expid), None),
+        ('get_extrafields',
+         lambda: eln.get_extrafields(expid=expid), None),
+        ('get_file_csv_data',
+         lambda: eln.get_file_csv_data('data.csv', expid=expid), None),
+        ('get_file_hdf5_data', hdf5('memory'), None),
+        ("get_file_hdf5_data (access='lazy')", hdf5('lazy'), None),
+        ('create_extrafield',
+         lambda: eln.create_extrafield('new', 1.0, 'number', expid=expid),
+         lambda: eln.delete_extrafield('new', expid=expid)),
+        ('update_extrafield',
+         lambda: eln.update_extrafield('field0', next(counter), expid=expid),
+         None),
+        ('set_extrafields',
+         lambda: eln.set_extrafields({'field%d' % i: next(counter)
+                                      for i in range(10)}, expid=expid),
+         None),
+        ('upload_bytes', upload(False), None),
+        ('upload_bytes (retried after 429)', upload(True), None),
+    ]
+
+
+def measure(mock: MockELabFTW, func, cleanup, repeat: int):
+    cold, warm = [], []
+    for _ in range(repeat):
+        eln.clear_cache(files=True)
+        mock.reset_counters()
+        start = time.perf_counter()
+        func()
+        cold.append(time.perf_counter() - start)
+        roundtrips, received = mock.roundtrips, mock.bytes_sent
+        if cleanup is not None:
+            cleanup()
+        start = time.perf_counter()
+        func()
+        warm.append(time.perf_counter() - start)
+        if cleanup is not None:
+            cleanup()
+
+    eln.clear_cache(files=True)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if cleanup is not None:
+        cleanup()
+    return {'cold': statistics.median(cold), 'warm': statistics.median(warm),
+            'roundtrips': roundtrips, 'bytes': received, 'peak': peak}
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        if result['roundtrips'] > old['roundtrips']:
+            regressions.append('%s: %d requests instead of %d'
+                               % (name, result['roundtrips'],
+                                  old['roundtrips']))
+        for key in ('cold', 'peak'):
+            if result[key] > tolerance * old[key]:
+                regressions.append('%s: %s %.4g instead of %.4g'
+                                   % (name, key, result[key], old[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help='delay per request in seconds')
+    parser.add_argument('--rows', type=int, default=10000,
+                        help='rows of the table and of the csv file')
+    parser.add_argument('--file-size', type=float, default=10,
+                        help='size of the hdf5 file in MB')
+    parser.add_argument('--experiments', type=int, default=200,
+                        help='number of experiments on the server')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help='save the results to a json file')
+    parser.add_argument('--compare', help='compare with saved results')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    args = parser.parse_args()
+
+    results = {}
+    with MockELabFTW(latency=args.latency) as mock:
+        expid = setup_server(mock, args)
+        eln.connect(mock.url, 'apikey', cache_size=64)
+        print('latency %.3f s, %d rows, hdf5 file %.1f MB, %d experiments'
+              % (args.latency, args.rows, args.file_size, args.experiments))
+        print('%-36s %9s %9s %8s %11s %10s'
+              % ('function', 'cold [s]', 'warm [s]', 'requests',
+                 'received', 'peak mem'))
+        for name, func, cleanup in cases(mock, expid):
+            result = measure(mock, func, cleanup, args.repeat)
+            results[name] = result
+            print('%-36s %9.4f %9.4f %8d %8.2f MB %7.2f MB'
+                  % (name, result['cold'], result['warm'],
+                     result['roundtrips'], result['bytes'] / 1e6,
+                     result['peak'] / 1e6))
+        eln.disconnect()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the time needed for `import pyelabdata`.
+
+Imports pyelabdata in fresh interpreters and reports the median time.
+Exits with status 1 if one of the large dependencies, which should only be
+imported on first use, is loaded by the import.
+
+Usage: python benchmarks/bench_import.py [repeat]
+"""
+
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# measure the checkout this script belongs to, not an installed release
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFERRED = ('numpy', 'pandas', 'h5py', 'matplotlib', 'ipylab',
+            'elabapi_python', 'lxml')
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import pyelabdata
+print(time.perf_counter() - start)
+print(' '.join(m for m in %r if m in sys.modules))
+""" % (DEFERRED,)
+
+
+def measure():
+    out = subprocess.run([sys.executable, '-c', SCRIPT], check=True,
+                         capture_output=True, text=True, cwd=ROOT).stdout
+    seconds, loaded = (out.split('\n') + [''])[:2]
+    return float(seconds), loaded.split()
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    times = []
+    for _ in range(repeat):
+        seconds, loaded = measure()
+        times.append(seconds)
+
+    print('import pyelabdata: %.1f ms (median of %d, min %.1f ms)'
+          % (statistics.median(times) * 1e3, repeat, min(times) * 1e3))
+    if loaded:
+        print('imported on import: %s' % ', '.join(loaded))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
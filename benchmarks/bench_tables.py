@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of reading numeric tables from an experiment body.
+
+Compares pandas.read_html over the whole body (as done on every call
+of get_table_data before tables were indexed) with the 'pandas' and
+'native' engines of get_table_data. No server is needed.
+
+Usage: python benchmarks/bench_tables.py [rows] [tables]
+"""
+
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# benchmark the checkout this script belongs to, not an installed release
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pyelabdata.pyelabdata import _TableIndex
+
+
+def make_body(rows: int, tables: int, decimal: str=','):
+    body = []
+    for tableno in range(tables):
+        cells = ''.join(
+            '<tr><td>%d</td><td>%s</td><td>%s</td></tr>'
+            % (i, ('%.4f' % (i / 7)).replace('.', decimal),
+               ('%.2f' % (i * 1.1)).replace('.', decimal))
+            for i in range(rows))
+        body.append('<h2>Run %d</h2><table><tr><td>n</td><td>x</td>'
+                    '<td>y</td></tr>%s</table>' % (tableno, cells))
+    return ''.join(body)
+
+
+def timeit(func, repeat: int=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def read_html_each(body: str, tables: int):
+    # the former get_table_data: parse the whole body for every table
+    result = []
+    for tableidx in range(tables):
+        frames = pd.read_html(StringIO(body), decimal=',', thousands='.')
+        table = frames[tableidx].iloc[1:]
+        table.columns = frames[tableidx].iloc[0]
+        result.append(np.array(table.to_numpy(), dtype=float))
+    return result
+
+
+def engine(body: str, name: str):
+    index = _TableIndex(body)
+    if name == 'pandas':
+        result = []
+        for position in range(len(index)):
+            frame = index.table(position, ',', '.')
+            result.append(np.array(frame.iloc[1:].to_numpy(), dtype=float))
+        return result
+    return [index.array(position, ',', '.', True)[1].T
+            for position in range(len(index))]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tables = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    body = make_body(rows, tables)
+    print('%d tables with %d rows, body size %.1f MB'
+          % (tables, rows, len(body) / 1e6))
+
+    t_old, ref = timeit(lambda: read_html_each(body, tables), repeat=1)
+    t_pandas, res_pandas = timeit(lambda: engine(body, 'pandas'))
+    t_native, res_native = timeit(lambda: engine(body, 'native'))
+    for a, b, c in zip(ref, res_pandas, res_native):
+        assert np.allclose(a, b) and np.allclose(a, c)
+
+    print('read_html per table : %8.3f s' % t_old)
+    print("engine='pandas'     : %8.3f s" % t_pandas)
+    print("engine='native'     : %8.3f s  (%.1fx faster than read_html "
+          "per table)" % (t_native, t_old / t_native))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the parts of the eLabFTW API v2 used by pyelabdata.
+
+Serves the teams, users, info, experiments and uploads endpoints from an
+in-memory data store on localhost, with a configurable delay per request,
+and counts the requests per endpoint and the bytes sent. Used by
+benchmarks/bench_api.py.
+"""
+
+import email.parser
+import email.policy
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class MockELabFTW:
+    """In-memory eLabFTW data store served over HTTP on localhost.
+
+    Parameters
+    ----------
+    latency : float, optional
+        Delay in seconds added to every request.
+        The default is 0.
+    teamid : int, optional
+        The id of the team associated with the api key.
+        The default is 1.
+    """
+
+    def __init__(self, latency: float=0.0, teamid: int=1):
+        self.latency = latency
+        self.teamid = teamid
+        self.experiments = {}
+        self.uploads = {}
+        self.files = {}
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self.support_range = True
+        self.fail_next = []
+        self._nextid = 1
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    # data setup
+
+    def add_experiment(self, title: str='', body_html: str='', metadata=None,
+                       tags=None, team: int=None):
+        with self._lock:
+            expid = self._nextid
+            self._nextid += 1
+        self.experiments[expid] = {
+            'id': expid, 'title': title, 'body': body_html,
+            'body_html': body_html,
+            'metadata': None if metadata is None else json.dumps(metadata),
+            'tags': '|'.join(tags or []),
+            'team': self.teamid if team is None else team,
+            'modified_at': self.__timestamp(), 'type': 'experiments'}
+        self.uploads[expid] = []
+        return expid
+
+    def add_upload(self, expid: int, real_name: str, data: bytes,
+                   comment: str=''):
+        with self._lock:
+            uploadid = self._nextid
+            self._nextid += 1
+        self.files[uploadid] = data
+        self.uploads[expid].append({
+            'id': uploadid, 'real_name': real_name,
+            'long_name': '%s/%s-%s' % (hashlib.md5(data).hexdigest()[:2],
+                                       uploadid, real_name),
+            'comment': comment, 'item_id': expid, 'state': 1,
+            'filesize': len(data),
+            'hash': hashlib.sha256(data).hexdigest(),
+            'hash_algorithm': 'sha256',
+            'created_at': self.__timestamp()})
+        return uploadid
+
+    @staticmethod
+    def __timestamp():
+        return '%.6f' % time.time()
+
+    # server control
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d/api/v2' % self._server.server_address[1]
+
+    def start(self):
+        handler = type('Handler', (_Handler,), {'mock': self})
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counters(self):
+        self.requests.clear()
+        self.bytes_sent = 0
+
+    @property
+    def roundtrips(self):
+        return sum(self.requests.values())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    mock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def __send(self, status, payload=None, headers=None, raw=None):
+        if raw is None:
+            raw = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        if raw or payload is not None:
+            self.send_header('Content-Type', 'application/json'
+                             if payload is not None else
+                             'application/octet-stream')
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            try:
+                self.wfile.write(raw)
+            except (BrokenPipeError, ConnectionResetError):
+                # client closed a streamed download early
+                self.close_connection = True
+        self.mock.bytes_sent += len(raw)
+
+    def __dispatch(self):
+        mock = self.mock
+        url = urlparse(self.path)
+        path = url.path[len('/api/v2'):]
+        query = parse_qs(url.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        route = re.sub(r'/\d+', '/{id}', path)
+        mock.requests[(self.command, route)] += 1
+        if mock.latency:
+            time.sleep(mock.latency)
+        if mock.fail_next:
+            status, headers = mock.fail_next.pop(0)
+            return self.__send(status, {'code': status}, headers)
+
+        parts = [p for p in path.split('/') if p]
+        if parts == ['teams', 'current']:
+            return self.__send(200, {'id': mock.teamid, 'name': 'Team'})
+        if parts == ['users', 'me']:
+            return self.__send(200, {'userid': 1, 'fullname': 'Test User',
+                                     'team': mock.teamid})
+        if parts == ['info']:
+            return self.__send(200, {'elabftw_version': '5.1.0',
+                                     'elabftw_version_int': 50100})
+        if parts[0] != 'experiments':
+            return self.__send(404, {'code': 404})
+
+        if len(parts) == 1 and self.command == 'GET':
+            exps = list(mock.experiments.values())
+            q = query.get('q', [''])[0]
+            if q:
+                exps = [e for e in exps
+                        if q in e['title'] or q in e['body']]
+            for tag in query.get('tags[]', []):
+                exps = [e for e in exps if tag in e['tags'].split('|')]
+            offset = int(query.get('offset', [0])[0])
+            limit = int(query.get('limit', [15])[0])
+            return self.__send(200, exps[offset:offset + limit])
+
+        expid = int(parts[1])
+        if expid not in mock.experiments:
+            return self.__send(404, {'code': 404})
+        exp = mock.experiments[expid]
+        if len(parts) == 2:
+            if self.command == 'GET':
+                return self.__send(200, exp)
+            if self.command == 'PATCH':
+                data = json.loads(body or b'{}')
+                if data.get('action') == 'updatemetadatafield':
+                    metadata = json.loads(exp['metadata'])
+                    for key, value in data.items():
+                        if key != 'action':
+                            metadata['extra_fields'][key]['value'] = value
+                    exp['metadata'] = json.dumps(metadata)
+                else:
+                    exp.update(data)
+                exp['modified_at'] = '%.6f' % time.time()
+                return self.__send(200, exp)
+
+        uploads = mock.uploads[expid]
+        if len(parts) == 3 and self.command == 'GET':
+            return self.__send(200, [u for u in uploads if u['state'] == 1])
+        if len(parts) == 3 and self.command == 'POST':
+            name, data, comment = self.__parse_multipart(body)
+            uploadid = mock.add_upload(expid, name, data, comment)
+            return self.__send(201, headers={
+                'Location': '%s/experiments/%d/uploads/%d'
+                            % (mock.url, expid, uploadid)})
+
+        uploadid = int(parts[3])
+        upload = [u for u in uploads if u['id'] == uploadid]
+        if not upload:
+            return self.__send(404, {'code': 404})
+        upload = upload[0]
+        if self.command == 'POST':
+            name, data, comment = self.__parse_multipart(body)
+            upload['state'] = 2
+            newid = mock.add_upload(expid, name, data, comment)
+            return self.__send(201, headers={
+                'Location': '%s/experiments/%d/uploads/%d'
+                            % (mock.url, expid, newid)})
+        if self.command == 'GET':
+            if query.get('format', [''])[0] != 'binary':
+                return self.__send(200, upload)
+            data = mock.files[uploadid]
+            rng = self.headers.get('Range')
+            if rng and mock.support_range:
+                start, end = rng.split('=')[1].split('-')
+                start = int(start)
+                end = min(int(end) if end else len(data) - 1, len(data) - 1)
+                return self.__send(206, raw=data[start:end + 1], headers={
+                    'Content-Range': 'bytes %d-%d/%d'
+                                     % (start, end, len(data))})
+            return self.__send(200, raw=data)
+        return self.__send(405, {'code': 405})
+
+    def __parse_multipart(self, body):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b'Content-Type: ' + self.headers['Content-Type'].encode()
+            + b'\r\n\r\n' + body)
+        name, data, comment = None, b'', ''
+        for part in message.iter_parts():
+            field = part.get_param('name', header='content-disposition')
+            if field == 'file':
+                name = part.get_filename()
+                data = part.get_payload(decode=True)
+            elif field == 'comment':
+                comment = part.get_content()
+        return name, data, comment
+
+    do_GET = do_POST = do_PATCH = do_HEAD = __dispatch
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio interface of pyelabdata.
+
+The functions in this module have the same parameters and results as
+the functions of the same name in pyelabdata, but are coroutines, e.g.
+
+    from pyelabdata import aio
+    data = await aio.get_file_data('data.csv', expid=42)
+
+The requests are carried out by a pool of worker threads sharing the
+connection pool of the connection established with
+pyelabdata.connect() (or of the session given by the keyword argument
+session), so that the event loop is not blocked. At most
+max_concurrency requests run at the same time (see set_max_concurrency()).
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import pyelabdata as _ped
+
+
+__EXECUTOR__ = None
+__MAXCONCURRENCY__ = 8
+__LOCK__ = threading.Lock()
+
+
+def set_max_concurrency(max_concurrency: int):
+    """Set the maximum number of requests to the eLabFTW server carried
+    out at the same time by the coroutines of this module; further
+    calls wait until a request has finished.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        The maximum number of concurrent requests.
+        The default is 8.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    global __EXECUTOR__
+    global __MAXCONCURRENCY__
+    with __LOCK__:
+        __MAXCONCURRENCY__ = max_concurrency
+        if __EXECUTOR__ is not None:
+            # running requests are finished by the old workers
+            __EXECUTOR__.shutdown(wait=False)
+            __EXECUTOR__ = None
+
+
+def __get_executor():
+    global __EXECUTOR__
+    with __LOCK__:
+        if __EXECUTOR__ is None:
+            __EXECUTOR__ = ThreadPoolExecutor(
+                max_workers=__MAXCONCURRENCY__,
+                thread_name_prefix='pyelabdata-aio')
+        return __EXECUTOR__
+
+
+def __coroutine(func):
+    # coroutine version of func, run by the worker threads
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            __get_executor(), functools.partial(func, *args, **kwargs))
+    wrapper.__doc__ = ('Coroutine version of pyelabdata.' + func.__name__
+                       + '().\n' + (func.__doc__ or ''))
+    return wrapper
+
+
+### General functions ###
+
+get_teamid = __coroutine(_ped.get_teamid)
+list_experiments = __coroutine(_ped.list_experiments)
+
+
+### Read experiment data ###
+
+get_experimentdata = __coroutine(_ped.get_experimentdata)
+get_maintext = __coroutine(_ped.get_maintext)
+get_table_data = __coroutine(_ped.get_table_data)
+get_all_tables = __coroutine(_ped.get_all_tables)
+get_extrafields = __coroutine(_ped.get_extrafields)
+get_extrafield_schema = __coroutine(_ped.get_extrafield_schema)
+extrafields_table = __coroutine(_ped.extrafields_table)
+
+
+### Read files ###
+
+get_file_data = __coroutine(_ped.get_file_data)
+get_file_to_path = __coroutine(_ped.get_file_to_path)
+get_file_csv_data = __coroutine(_ped.get_file_csv_data)
+get_file_hdf5_data = __coroutine(_ped.get_file_hdf5_data)
+
+
+### Update experiment data ###
+
+create_extrafield = __coroutine(_ped.create_extrafield)
+update_extrafield = __coroutine(_ped.update_extrafield)
+delete_extrafield = __coroutine(_ped.delete_extrafield)
+set_extrafields = __coroutine(_ped.set_extrafields)
+
+
+### Upload files ###
+
+upload_file = __coroutine(_ped.upload_file)
+upload_bytes = __coroutine(_ped.upload_bytes)
+upload_files_batch = __coroutine(_ped.upload_files_batch)
+upload_image_from_figure = __coroutine(_ped.upload_image_from_figure)
+upload_csv_data = __coroutine(_ped.upload_csv_data)
@@ -3,32 +3,1283 @@
 @author: Michael Krieger (lapmk)
 """
 
-import numpy as np
-import elabapi_python
-import pandas as pd
+from __future__ import annotations
+
+import copy
+import csv
 import json
-import h5py
+import math
+import re
+import mimetypes
+import hashlib
+import functools
+import importlib
+import atexit
+import io
 import tempfile
 import os
+import shutil
 import time
-from matplotlib.figure import Figure
-from io import StringIO, BytesIO
+import random
+import contextvars
+import threading
+import warnings
+import socket
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from io import StringIO, BytesIO, BufferedReader, TextIOWrapper
 from pathlib import Path
 from datetime import datetime, date as dt_date, time as dt_time
-from ipylab import JupyterFrontEnd
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING
 import asyncio
 
 
-__APICLIENT__ = None
-__EXPID__ = None
+class _LazyModule:
+    """Proxy for a module, which is imported on first access of one
+    of its attributes, so that importing pyelabdata does not load large
+    packages that are not needed.
+
+    Parameters
+    ----------
+    name : str
+        The full name of the module.
+
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str):
+        # only called for attributes not yet copied from the module
+        value = getattr(importlib.import_module(self._name), attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self):
+        return '<lazily imported module %r>' % self._name
+
+
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
+h5py = _LazyModule('h5py')
+elabapi_python = _LazyModule('elabapi_python')
+lxml_html = _LazyModule('lxml.html')
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+
+__SESSION__ = None
+
+__APP__ = None
+
+
+### Caches ###
+
+
+class _LRUCache:
+    """Thread-safe LRU cache with a time-to-live for its entries.
+
+    Parameters
+    ----------
+    ttl : float
+        Time in seconds after which a cached entry is fetched again.
+        If 0, nothing is cached.
+    maxsize : int
+        Maximum number of entries kept in the cache;
+        the least recently used entry is discarded first.
+
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def info(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'maxsize': self.maxsize,
+                    'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses}
+
 
-__APP__ = JupyterFrontEnd()
+class _UploadIndex:
+    """Lookup tables for the uploads (attachments) of one experiment.
+    
+    Uploads are indexed by id, real_name and long_name; if several
+    uploads share a name, the first one listed by eLabFTW is found.
+
+    Parameters
+    ----------
+    uploads : list
+        The upload records as returned by UploadsApi.read_uploads.
+
+    """
+
+    def __init__(self, uploads):
+        self.uploads = {}
+        self._by_real_name = {}
+        self._by_long_name = {}
+        self._lock = threading.Lock()
+        for upload in uploads:
+            self.add(upload)
+
+    def add(self, upload):
+        with self._lock:
+            self.uploads[upload.id] = upload
+            self._by_real_name.setdefault(upload.real_name, upload.id)
+            if upload.long_name is not None:
+                self._by_long_name.setdefault(upload.long_name, upload.id)
+
+    def remove(self, uploadid: int):
+        with self._lock:
+            upload = self.uploads.pop(uploadid, None)
+            if upload is None:
+                return
+            # another upload with the same name may take over
+            for names, name in ((self._by_real_name, upload.real_name),
+                                (self._by_long_name, upload.long_name)):
+                if names.get(name) == uploadid:
+                    del names[name]
+            for other in self.uploads.values():
+                if other.real_name == upload.real_name:
+                    self._by_real_name.setdefault(other.real_name, other.id)
+                if other.long_name is not None and other.long_name == upload.long_name:
+                    self._by_long_name.setdefault(other.long_name, other.id)
+
+    def find(self, filename: str, filename_is_long_name: bool=False):
+        with self._lock:
+            if filename_is_long_name:
+                return self._by_long_name.get(filename)
+            return self._by_real_name.get(filename)
+
+
+class _TableIndex:
+    """The tables contained in one revision of an experiment's body.
+
+    The body is parsed once; each table is converted on first use and
+    kept for each combination of decimal and thousands separators.
+    Tables can be looked up by index or by the text of their caption or
+    of the heading preceding them.
+
+    Parameters
+    ----------
+    body_html : str
+        The html body of the experiment.
+
+    """
+
+    def __init__(self, body_html: str):
+        self.revision = self.revision_of(body_html)
+        self.captions = []
+        self.headings = []
+        self._elements = []
+        self._frames = {}
+        self._arrays = {}
+        self._lock = threading.Lock()
+        if not body_html:
+            return
+        with _span('parse_html', bytes=len(body_html)):
+            self.__index(lxml_html.fromstring(body_html))
+
+    def __index(self, doc):
+        # walk the document once, remembering the last heading seen
+        # before each table
+        heading = None
+        for element in doc.iter('table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            if element.tag != 'table':
+                heading = element
+                continue
+            # tables without cells are skipped, as by pandas.read_html
+            if next(element.iter('td', 'th'), None) is None:
+                continue
+            caption = element.find('caption')
+            self.captions.append(None if caption is None
+                                 else caption.text_content().strip())
+            self.headings.append(None if heading is None
+                                 else heading.text_content().strip())
+            self._elements.append(element)
+
+    @staticmethod
+    def revision_of(body_html: str):
+        return hashlib.sha1((body_html or '').encode()).hexdigest()
+
+    def __len__(self):
+        return len(self._elements)
+
+    def find(self, tableidx) -> int:
+        """Return the position of the table given by its index or by
+        (part of) its caption or heading."""
+        if not isinstance(tableidx, str):
+            return range(len(self._elements))[tableidx]
+        
+        # prefer exact matches of caption or heading over partial matches
+        titles = list(zip(self.captions, self.headings))
+        for position, (caption, heading) in enumerate(titles):
+            if tableidx in (caption, heading):
+                return position
+        for position, (caption, heading) in enumerate(titles):
+            for title in (caption, heading):
+                if title is not None and tableidx.lower() in title.lower():
+                    return position
+        raise RuntimeError('Table "' + tableidx + '" not found')
+
+    def table(self, position: int, decimal: str, thousands: str):
+        """Return the table at position as parsed by pandas.read_html,
+        or None if pandas cannot read it."""
+        key = (position, decimal, thousands)
+        with self._lock:
+            if key not in self._frames:
+                html = lxml_html.tostring(self._elements[position],
+                                          encoding='unicode')
+                try:
+                    with _span('read_html', bytes=len(html)):
+                        frame = pd.read_html(StringIO(html), flavor='lxml',
+                                             decimal=decimal,
+                                             thousands=thousands)[0]
+                except ValueError:
+                    frame = None
+                self._frames[key] = frame
+            return self._frames[key]
+
+    def array(self, position: int, decimal: str, thousands: str,
+              header: bool):
+        """Return the column names and a float array with one row per
+        column of the table at position."""
+        key = (position, decimal, thousands, header)
+        with self._lock:
+            if key not in self._arrays:
+                with _span('extract_table'):
+                    self._arrays[key] = self.__extract(
+                        self._elements[position], decimal, thousands, header)
+            return self._arrays[key]
+
+    @staticmethod
+    def __extract(table, decimal: str, thousands: str, header: bool):
+        rows = []
+        for row in table.iter('tr'):
+            cells = []
+            for cell in row:
+                if cell.tag in ('td', 'th'):
+                    text = cell.text if len(cell) == 0 else cell.text_content()
+                    if text is None:
+                        text = ''
+                    span = cell.get('colspan')
+                    cells.extend([text] * (int(span) if span and
+                                           span.isdigit() else 1))
+            rows.append(cells)
+        ncols = max((len(cells) for cells in rows), default=0)
+
+        if header and rows:
+            names = [text.strip() for text in rows.pop(0)]
+            names += [str(col) for col in range(len(names), ncols)]
+        else:
+            names = list(range(ncols))
+
+        # convert the cells while filling a preallocated array
+        values = np.full((ncols, len(rows)), np.nan)
+        for rowno, cells in enumerate(rows):
+            for colno, text in enumerate(cells):
+                if thousands and thousands in text:
+                    text = text.replace(thousands, '')
+                if decimal != '.' and decimal in text:
+                    text = text.replace(decimal, '.')
+                try:
+                    values[colno, rowno] = float(text)
+                except ValueError:
+                    pass
+        return names, values
+
+
+class _FileCache:
+    """Persistent cache of downloaded uploads (attachments) in a local 
+    directory.
+
+    Since eLabFTW assigns a new id to a replaced upload, a cached file
+    is identified by the hash of its content as listed by eLabFTW or,
+    if no hash is known, by server, experiment, upload id and size.
+    Cached files are verified against this hash when stored. The least
+    recently used files are removed when the cache exceeds its size;
+    files larger than the whole cache are not cached (see fits()).
+    Cached files are returned opened, so that they stay readable if
+    they are removed from the cache by another thread.
+
+    Parameters
+    ----------
+    path : str
+        The directory in which the files are stored; it is created
+        if necessary.
+    max_size : int
+        Maximum total size of the cached files in bytes.
+    host : str
+        The URL of the eLabFTW server, used to distinguish uploads
+        of different servers without a hash.
+
+    """
+
+    def __init__(self, path: str, max_size: int, host: str):
+        self.path = os.path.abspath(path)
+        self.max_size = max_size
+        self.host = host
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, expid: int, upload):
+        if upload.hash and upload.hash_algorithm:
+            return upload.hash_algorithm + '-' + upload.hash
+        name = '%s/%s/%s/%s' % (self.host, expid, upload.id, upload.filesize)
+        return 'id-' + hashlib.sha256(name.encode()).hexdigest()
+
+    def fits(self, upload):
+        return upload.filesize is None or upload.filesize <= self.max_size
+
+    def get(self, key: str):
+        path = os.path.join(self.path, key)
+        try:
+            file = open(path, 'rb', buffering=0)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # mark as recently used
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return file
+
+    def store(self, key: str, stream, upload):
+        digest = None
+        if upload.hash and upload.hash_algorithm in hashlib.algorithms_available:
+            digest = hashlib.new(upload.hash_algorithm)
+
+        # write to a temporary file first, so that concurrent readers
+        # never see an incomplete file
+        fd, tmppath = tempfile.mkstemp(dir=self.path, suffix='.part')
+        try:
+            size = 0
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in iter(lambda: stream.read(1048576), b''):
+                    file.write(chunk)
+                    size += len(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+            if (digest is not None and digest.hexdigest() != upload.hash) or \
+                    (upload.filesize is not None and size != upload.filesize):
+                raise RuntimeError('Downloaded file does not match its '
+                                   'size or hash in eLabFTW')
+            # open the new file before other threads can evict it
+            path = os.path.join(self.path, key)
+            with self._lock:
+                os.replace(tmppath, path)
+                file = open(path, 'rb', buffering=0)
+        finally:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+        self.evict(keep=path)
+        return file
+
+    def __files(self):
+        files = []
+        for entry in os.scandir(self.path):
+            if entry.is_file() and not entry.name.endswith('.part'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def evict(self, keep: str=None):
+        with self._lock:
+            files = sorted(self.__files())
+            size = sum(file[1] for file in files)
+            for _, filesize, path in files:
+                if size <= self.max_size:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= filesize
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self.__files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def info(self):
+        with self._lock:
+            files = self.__files()
+            return {'path': self.path, 'entries': len(files),
+                    'size': sum(file[1] for file in files),
+                    'max_size': self.max_size,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+### Instrumentation ###
+
+
+class Span:
+    """A timed step of pyelabdata, i.e. a call of a function of 
+    pyelabdata ('call'), a request to the eLabFTW server ('request') or
+    the parsing of data ('parse'), as passed to the hooks registered with
+    add_hook().
+
+    Attributes
+    ----------
+    name : str
+        The name of the step, e.g. 'get_table_data', 'GET /experiments/{id}'
+        or 'read_html'.
+    kind : str
+        'call', 'request' or 'parse'.
+    attributes : dict
+        Further data of the step, e.g. 'http.status', 'bytes_received' and
+        'bytes_sent' for requests.
+    start_time : float
+        The time the step started in seconds since the epoch.
+    duration : float
+        The duration of the step in seconds.
+    error : Exception
+        The exception raised by the step or None.
+    trace_id, span_id, parent_id : str
+        Identifiers of the call the step belongs to, of the step and of
+        the enclosing step (None for calls of public functions).
+
+    """
+
+    __slots__ = ('name', 'kind', 'attributes', 'start_time', 'duration',
+                 'error', 'trace_id', 'span_id', 'parent_id', '_start')
+
+    def __init__(self, name: str, kind: str, attributes: dict, parent):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration = None
+        self.error = None
+        self.span_id = '%016x' % random.getrandbits(64)
+        if parent is None:
+            self.trace_id = '%032x' % random.getrandbits(128)
+            self.parent_id = None
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        self._start = time.perf_counter()
+
+    def __repr__(self):
+        return 'Span(%r, kind=%r, duration=%r)' % (self.name, self.kind,
+                                                   self.duration)
+
+
+class _StatsCollector:
+    """In-memory statistics of the finished spans, per kind and name.
+    Percentiles are computed from the most recent max_samples durations.
+
+    Parameters
+    ----------
+    max_samples : int
+        The number of durations kept for each name.
+
+    """
+
+    def __init__(self, max_samples: int=10000):
+        self.max_samples = max_samples
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        received = span.attributes.get('bytes_received') or 0
+        sent = span.attributes.get('bytes_sent') or 0
+        with self._lock:
+            entry = self._entries.get((span.kind, span.name))
+            if entry is None:
+                entry = self._entries[(span.kind, span.name)] = {
+                    'count': 0, 'errors': 0, 'total': 0.0,
+                    'bytes_received': 0, 'bytes_sent': 0,
+                    'durations': deque(maxlen=self.max_samples)}
+            entry['count'] += 1
+            if span.error is not None:
+                entry['errors'] += 1
+            entry['total'] += span.duration
+            entry['bytes_received'] += received
+            entry['bytes_sent'] += sent
+            entry['durations'].append(span.duration)
+
+    @staticmethod
+    def __percentile(durations: list, q: float):
+        # nearest-rank percentile of the sorted durations
+        return durations[max(math.ceil(q * len(durations)) - 1, 0)]
+
+    def info(self):
+        result = {}
+        with self._lock:
+            for (kind, name), entry in self._entries.items():
+                durations = sorted(entry['durations'])
+                result.setdefault(kind, {})[name] = {
+                    'count': entry['count'], 'errors': entry['errors'],
+                    'total': entry['total'],
+                    'p50': self.__percentile(durations, 0.5),
+                    'p95': self.__percentile(durations, 0.95),
+                    'bytes_received': entry['bytes_received'],
+                    'bytes_sent': entry['bytes_sent']}
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _SpanExporter:
+    """Hook appending each span as a line of JSON to a file, using the
+    field names of the OpenTelemetry protocol.
+
+    Parameters
+    ----------
+    path : str
+        The file the spans are appended to.
+
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span):
+        start = int(span.start_time * 1e9)
+        record = {'name': span.name, 'kind': span.kind,
+                  'trace_id': span.trace_id, 'span_id': span.span_id,
+                  'parent_span_id': span.parent_id,
+                  'start_time_unix_nano': start,
+                  'end_time_unix_nano': start + int(span.duration * 1e9),
+                  'attributes': span.attributes,
+                  'status': {'code': 'OK'} if span.error is None else
+                            {'code': 'ERROR', 'message': repr(span.error)}}
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+__CURRENTSPAN__ = contextvars.ContextVar('pyelabdata_span', default=None)
+__HOOKS__ = []
+__STATS__ = _StatsCollector()
+__EXPORTER__ = None
+
+
+@contextmanager
+def _span(name: str, kind: str='parse', **attributes):
+    # time the enclosed step, which may add attributes to the yielded span
+    span = Span(name, kind, attributes, __CURRENTSPAN__.get())
+    token = __CURRENTSPAN__.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = e
+        raise
+    finally:
+        __CURRENTSPAN__.reset(token)
+        span.duration = time.perf_counter() - span._start
+        __STATS__.add(span)
+        for hook in tuple(__HOOKS__):
+            # a failing hook must not affect the step it observes
+            try:
+                hook(span)
+            except Exception as e:
+                warnings.warn('pyelabdata hook %r failed: %r' % (hook, e),
+                              RuntimeWarning, stacklevel=2)
+
+
+def _traced(func):
+    # record calls of a public function as spans of kind 'call'
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _span(func.__name__, 'call'):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _in_span(func):
+    # run func in another thread as part of the current span
+    parent = __CURRENTSPAN__.get()
+    def run(*args, **kwargs):
+        token = __CURRENTSPAN__.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            __CURRENTSPAN__.reset(token)
+    return run
+
+
+def _loads_metadata(metadata) -> dict:
+    # parse the metadata of an experiment (None for no metadata)
+    if not metadata:
+        return {}
+    with _span('metadata_json', bytes=len(metadata)):
+        return json.loads(metadata)
+
+
+def add_hook(callback):
+    """Register a function which is called with a Span object after each
+    step of pyelabdata, i.e. each call of a function, each request to the
+    eLabFTW server and each parsing of data.
+
+    Parameters
+    ----------
+    callback : callable
+        The function to be called with the finished span; it is called
+        in the thread which carried out the step. Exceptions raised by
+        it are reported as a RuntimeWarning and otherwise ignored.
+
+    Returns
+    -------
+    None.
+
+    """
+    __HOOKS__.append(callback)
+
+
+def remove_hook(callback):
+    """Remove a function registered with add_hook().
+
+    Parameters
+    ----------
+    callback : callable
+        The function to be removed.
+
+    Returns
+    -------
+    None.
+
+    """
+    __HOOKS__.remove(callback)
+
+
+def stats():
+    """Return statistics of the steps carried out by pyelabdata since
+    the start of the program or the last call of reset_stats().
+
+    Returns
+    -------
+    dictionary
+        Returns a dictionary with the entries 'call' (functions of 
+        pyelabdata), 'request' (requests to the server) and 'parse' 
+        (parsing of data), each containing a dictionary with the number 
+        of steps ('count'), the number of 'errors', the 'total' time and
+        the median ('p50') and 95th percentile ('p95') of the duration in
+        seconds as well as 'bytes_received' and 'bytes_sent' for each
+        name of a step; and the entry 'caches' with the 'hit_ratio' of
+        each cache of the current session (see cache_info()).
+
+    """
+
+    result = {'call': {}, 'request': {}, 'parse': {}}
+    result.update(__STATS__.info())
+    caches = {}
+    if __SESSION__ is not None and __SESSION__.api_client is not None:
+        for name, info in __SESSION__.cache_info().items():
+            if info is not None:
+                lookups = info['hits'] + info['misses']
+                caches[name] = dict(info, hit_ratio=info['hits'] / lookups
+                                    if lookups else None)
+    result['caches'] = caches
+    return result
+
+
+def reset_stats():
+    """Discard the statistics returned by stats().
+
+    Returns
+    -------
+    None.
+
+    """
+    __STATS__.clear()
+
+
+def export_spans(path: str=None):
+    """Append all following steps of pyelabdata as spans to a local
+    file, one JSON object per line with the fields of the OpenTelemetry
+    protocol (name, trace_id, span_id, parent_span_id, 
+    start_time_unix_nano, end_time_unix_nano, attributes, status).
+
+    Parameters
+    ----------
+    path : str, optional
+        The file the spans are appended to. If None, a previously 
+        started export is stopped.
+        The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    global __EXPORTER__
+    if __EXPORTER__ is not None:
+        remove_hook(__EXPORTER__)
+        __EXPORTER__.close()
+        __EXPORTER__ = None
+    if path is not None:
+        __EXPORTER__ = _SpanExporter(path)
+        add_hook(__EXPORTER__)
+
+
+### Retries ###
+
+
+# set while pyelabdata sends requests which may always be repeated
+__IDEMPOTENT__ = contextvars.ContextVar('pyelabdata_idempotent', default=False)
+
+
+class RetryPolicy:
+    """Policy for repeating requests to the eLabFTW server which failed
+    because of a temporary problem, i.e. a connection error or one of the
+    http status codes given in statuses.
+
+    A request is repeated after a random delay between 0 and 
+    backoff * 2**attempt seconds (at most max_backoff), or after the time
+    requested by the server in a Retry-After header. Requests with a
+    method not given in methods (by default uploads and other POST or
+    PATCH requests) are only repeated if the server certainly did not
+    process them, i.e. if no connection could be established or the
+    server answered with status 429. The PATCH requests with which
+    pyelabdata sets extra fields to given values are idempotent and
+    therefore repeated like the methods given in methods.
+
+    Parameters
+    ----------
+    max_retries : int, optional
+        The maximum number of times a request is repeated; 0 disables
+        retries.
+        The default is 3.
+    backoff : float, optional
+        The base delay of the exponential backoff in seconds.
+        The default is 0.5.
+    max_backoff : float, optional
+        The maximum random delay between two attempts in seconds.
+        The default is 30.
+    deadline : float, optional
+        The time in seconds after the first attempt after which a request
+        is not repeated anymore, including the delays. If None, there is
+        no limit.
+        The default is 120.
+    statuses : tuple, optional
+        The http status codes indicating a temporary problem.
+        The default is (429, 500, 502, 503, 504).
+    methods : tuple, optional
+        The http methods of requests which may be repeated after any
+        temporary problem.
+        The default is ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE').
+
+    """
+
+    def __init__(self, max_retries: int=3, backoff: float=0.5,
+                 max_backoff: float=30.0, deadline: float=120.0,
+                 statuses=(429, 500, 502, 503, 504),
+                 methods=('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.statuses = tuple(statuses)
+        self.methods = tuple(method.upper() for method in methods)
+
+    def __repr__(self):
+        return ('RetryPolicy(max_retries=%r, backoff=%r, max_backoff=%r, '
+                'deadline=%r)' % (self.max_retries, self.backoff,
+                                  self.max_backoff, self.deadline))
+
+    def next_delay(self, method: str, error: Exception, attempt: int,
+                   elapsed: float, idempotent: bool=False):
+        """Return the delay in seconds after which a failed request is
+        repeated, or None if it should not be repeated.
+
+        Parameters
+        ----------
+        method : str
+            The http method of the request.
+        error : Exception
+            The exception raised by the failed attempt.
+        attempt : int
+            The number of the failed attempt, starting at 0.
+        elapsed : float
+            The time in seconds since the first attempt.
+        idempotent : bool, optional
+            True if the request may be repeated after any temporary
+            problem regardless of its method.
+            The default is False.
+
+        Returns
+        -------
+        float or None
+            The delay in seconds or None.
+
+        """
+        from urllib3 import exceptions
+
+        if attempt >= self.max_retries:
+            return None
+        retry_after = None
+        if isinstance(error, elabapi_python.rest.ApiException):
+            if error.status not in self.statuses:
+                return None
+            unprocessed = error.status == 429
+            retry_after = self.__retry_after(error.headers)
+        elif isinstance(error, exceptions.HTTPError):
+            if isinstance(error, exceptions.MaxRetryError):
+                error = error.reason
+            if isinstance(error, exceptions.SSLError):
+                # e.g. certificate verification failed, not temporary
+                return None
+            unprocessed = isinstance(error, exceptions.ConnectTimeoutError)
+        else:
+            return None
+        if not unprocessed and not idempotent and \
+                method.upper() not in self.methods:
+            return None
+
+        if retry_after is None:
+            delay = random.uniform(0, min(self.max_backoff,
+                                          self.backoff * 2**attempt))
+        else:
+            delay = retry_after
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            return None
+        return delay
+
+    @staticmethod
+    def __retry_after(headers):
+        # Retry-After is given in seconds or as http date
+        value = headers.get('Retry-After') if headers else None
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max((date - datetime.now(date.tzinfo)).total_seconds(), 0.0)
+
+
+class _RetryingRequest:
+    """Replacement of the request method of the rest client of an api
+    client, which repeats failed requests according to a RetryPolicy,
+    counts the retries and records each attempt as a span.
+
+    Parameters
+    ----------
+    request : callable
+        The original request method.
+    policy : RetryPolicy
+        The policy applied to all requests.
+    host : str
+        The URL of the api, which is omitted in the names of the spans
+        recorded for each request.
+
+    """
+
+    def __init__(self, request, policy: RetryPolicy, host: str):
+        self.request = request
+        self.policy = policy
+        self.host = host
+        self.retries = 0
+        self.retried_requests = 0
+        self.failed_requests = 0
+        self.reasons = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, method: str, url: str, *args, **kwargs):
+        policy = self.policy
+        start = time.monotonic()
+        attempt = 0
+        # name the spans by the endpoint, e.g. GET /experiments/{id}
+        path = url.split('?', 1)[0]
+        if path.startswith(self.host):
+            path = path[len(self.host):]
+        name = method.upper() + ' ' + re.sub(r'/\d+', '/{id}', path)
+        while True:
+            # the rest client modifies the headers of multipart requests,
+            # so each attempt gets its own copy of them
+            attempt_kwargs = dict(kwargs)
+            if kwargs.get('headers') is not None:
+                attempt_kwargs['headers'] = dict(kwargs['headers'])
+            if kwargs.get('post_params') is not None:
+                attempt_kwargs['post_params'] = list(kwargs['post_params'])
+            try:
+                with _span(name, 'request', attempt=attempt,
+                           bytes_sent=self.__request_size(kwargs)) as span:
+                    response = self.__send(span, method, url, *args,
+                                           **attempt_kwargs)
+                return response
+            except Exception as e:
+                delay = policy.next_delay(method, e, attempt,
+                                          time.monotonic() - start,
+                                          __IDEMPOTENT__.get())
+                if delay is None:
+                    if attempt > 0:
+                        with self._lock:
+                            self.failed_requests += 1
+                    raise
+                # the http status or the name of the (underlying) exception
+                cause = getattr(e, 'reason', None)
+                if not isinstance(cause, Exception):
+                    cause = e
+                reason = str(getattr(e, 'status', None) or type(cause).__name__)
+                with self._lock:
+                    self.retries += 1
+                    if attempt == 0:
+                        self.retried_requests += 1
+                    self.reasons[reason] = self.reasons.get(reason, 0) + 1
+            time.sleep(delay)
+            attempt += 1
+
+    def __send(self, span: Span, method: str, url: str, *args, **kwargs):
+        try:
+            response = self.request(method, url, *args, **kwargs)
+        except elabapi_python.rest.ApiException as e:
+            span.attributes['http.status'] = e.status
+            raise
+        span.attributes['http.status'] = response.status
+        if kwargs.get('_preload_content', True):
+            span.attributes['bytes_received'] = len(response.data)
+        else:
+            # streamed responses are read by the caller
+            length = response.headers.get('Content-Length')
+            if length is not None and length.isdigit():
+                span.attributes['bytes_received'] = int(length)
+        return response
+
+    @staticmethod
+    def __request_size(kwargs):
+        size = 0
+        for _, value in kwargs.get('post_params') or []:
+            # multipart fields or (filename, data, mimetype) of files
+            size += len(value[1] if isinstance(value, tuple) else str(value))
+        body = kwargs.get('body')
+        if isinstance(body, (str, bytes)):
+            size += len(body)
+        elif body is not None:
+            size += len(json.dumps(body))
+        return size
+
+    def info(self):
+        with self._lock:
+            return {'retries': self.retries,
+                    'retried_requests': self.retried_requests,
+                    'failed_requests': self.failed_requests,
+                    'reasons': dict(self.reasons)}
 
 
 ### General functions ###
 
 
-def connect(host: str, apikey: str, verify_ssl: bool=True):
+class Session:
+    """Connection to an eLabFTW server, which owns its api client, the
+    pooled connections to the server, its caches and the experiment
+    opened by open_experiment().
+
+    The functions of pyelabdata are also available as methods of a session
+    (e.g. session.get_table_data(0, expid=42)), and each function accepts
+    the keyword argument session; if it is None, the session established
+    by connect() is used. A session can be used by several threads at the
+    same time; since the opened experiment is shared by all of them, 
+    threads working on different experiments should pass expid or use
+    Experiment objects (see experiment()).
+
+    The team id, user information and server version associated with
+    the api key are fetched from the server on first access and then
+    kept for the lifetime of the session; call refresh() to fetch them
+    again.
+
+    Parameters
+    ----------
+    host : str
+        URL to V2 api on the eLabFTW server, 
+        e.g. https://server/api/v2.
+    apikey : str
+        API key to be used in order to access the eLabFTW data.
+    The other parameters are described in connect().
+
+    """
+
+    def __init__(self, host: str, apikey: str, verify_ssl: bool=True,
+                 cache_ttl: float=30.0, cache_size: int=128,
+                 file_cache_dir: str=None, file_cache_size: int=2**30,
+                 pool_size: int=16, pool_block: bool=False,
+                 connect_timeout: float=None, read_timeout: float=None,
+                 gzip: bool=True, keepalive: bool=True,
+                 retry_policy: RetryPolicy=None):
+        # configure elabftw access
+        conf = elabapi_python.Configuration()
+        conf.api_key['api_key'] = apikey
+        conf.api_key_prefix['api_key'] = 'Authorization'
+        if 'api' in host:
+            conf.host = host
+        else:
+            if host[-1] == '/':
+                conf.host = host + 'api/v2'
+            else:
+                conf.host = host + '/api/v2'
+        conf.debug = False
+        conf.verify_ssl = verify_ssl
+        conf.connection_pool_maxsize = pool_size
+
+        # connect to api
+        apiclient = elabapi_python.ApiClient(conf)
+        apiclient.set_default_header(header_name='Authorization', 
+                                     header_value=apikey)
+
+        # configure the connection pools, which are created on first use
+        pool_kw = apiclient.rest_client.pool_manager.connection_pool_kw
+        pool_kw['block'] = pool_block
+        if connect_timeout is not None or read_timeout is not None:
+            _set_request_timeout(apiclient, (connect_timeout, read_timeout))
+        # repeat requests only according to the retry policy of the session,
+        # instead of the immediate retries by urllib3
+        from urllib3.util import Retry
+        pool_kw['retries'] = Retry(total=None, connect=0, read=0, status=0,
+                                   other=0, redirect=3,
+                                   respect_retry_after_header=False)
+        self._retrier = _RetryingRequest(
+            apiclient.rest_client.request,
+            RetryPolicy() if retry_policy is None else retry_policy, conf.host)
+        apiclient.rest_client.request = self._retrier
+        if keepalive:
+            from urllib3.connection import HTTPConnection
+            pool_kw['socket_options'] = HTTPConnection.default_socket_options + \
+                [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        else:
+            apiclient.set_default_header(header_name='Connection',
+                                         header_value='close')
+        if gzip:
+            apiclient.set_default_header(header_name='Accept-Encoding',
+                                         header_value='gzip')
+
+        self.api_client = apiclient
+        self.host = conf.host
+        self.expid = None
+        self._lock = threading.Lock()
+        self._teamid = None
+        self._userinfo = None
+        self._server_version = None
+        self._expcache = _LRUCache(cache_ttl, cache_size)
+        self._uploadcache = _LRUCache(cache_ttl, cache_size)
+        # parsed tables are tied to a body revision and never go stale
+        self._tablecache = _LRUCache(float('inf'), cache_size)
+        # field types hardly ever change and are updated by every read or
+        # write, so they are kept as long as caching is enabled at all
+        self._schemacache = _LRUCache(float('inf') if cache_ttl > 0 else 0,
+                                      cache_size)
+        if file_cache_dir is None:
+            self._filecache = None
+        else:
+            self._filecache = _FileCache(file_cache_dir, file_cache_size,
+                                         conf.host)
+
+    def __repr__(self):
+        return 'Session(host=%r)' % self.host
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def retry_policy(self):
+        """The RetryPolicy applied to all requests of this session."""
+        return self._retrier.policy
+
+    @retry_policy.setter
+    def retry_policy(self, policy: RetryPolicy):
+        self._retrier.policy = policy
+
+    @property
+    def teamid(self):
+        """The id of the team associated with the api key."""
+        with self._lock:
+            if self._teamid is None:
+                teams_api = elabapi_python.TeamsApi(self.api_client)
+                self._teamid = teams_api.read_team('current').id
+            return self._teamid
+
+    @property
+    def userinfo(self):
+        """A dictionary with the data of the user owning the api key."""
+        with self._lock:
+            if self._userinfo is None:
+                users_api = elabapi_python.UsersApi(self.api_client)
+                self._userinfo = users_api.read_user('me').to_dict()
+            return self._userinfo
+
+    @property
+    def server_version(self):
+        """The version of eLabFTW running on the server as a string."""
+        with self._lock:
+            if self._server_version is None:
+                info_api = elabapi_python.InfoApi(self.api_client)
+                info = info_api.get_info()
+                if isinstance(info, dict):
+                    self._server_version = info.get('elabftw_version')
+                else:
+                    self._server_version = info.elabftw_version
+            return self._server_version
+
+    def refresh(self):
+        """Discard the memoized team id, user information and server
+        version, so that they are fetched again on next access.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            self._teamid = None
+            self._userinfo = None
+            self._server_version = None
+
+    def experiment(self, expid: int):
+        """Return an Experiment object for accessing an experiment
+        through this session.
+
+        Parameters
+        ----------
+        expid : int
+            The id of the experiment in eLabFTW.
+
+        Returns
+        -------
+        Experiment
+            The experiment object.
+
+        """
+        return Experiment(self, expid)
+
+    def clear_cache(self, expid: int=None, files: bool=False):
+        """Discard cached data of this session (see clear_cache())."""
+        for cache in (self._expcache, self._uploadcache, self._tablecache,
+                      self._schemacache):
+            cache.invalidate(expid)
+        if files and self._filecache is not None:
+            self._filecache.clear()
+
+    def cache_info(self):
+        """Return statistics of the caches of this session 
+        (see cache_info())."""
+        return {'experiments': self._expcache.info(),
+                'uploads': self._uploadcache.info(),
+                'tables': self._tablecache.info(),
+                'schemas': self._schemacache.info(),
+                'files': None if self._filecache is None 
+                         else self._filecache.info()}
+
+    def retry_info(self):
+        """Return statistics of the repeated requests of this session
+        (see retry_info())."""
+        return self._retrier.info()
+
+    def close(self):
+        """Close all connections of this session to the server; the 
+        session cannot be used afterwards.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            if self.api_client is not None:
+                _close_apiclient(self.api_client)
+                self.api_client = None
+
+
+class Experiment:
+    """An experiment stored in eLabFTW, accessed through a session.
+
+    The functions of pyelabdata operating on a single experiment are
+    available as methods, with the experiment and the session already
+    given, e.g.
+
+        exp = session.experiment(42)
+        data = exp.get_table_data('Results')
+        exp.set_extrafields({'voltage': 1.5})
+
+    Unlike open_experiment(), experiment objects do not change the 
+    state of the session, so that several threads can work on different
+    experiments with the same session.
+
+    Parameters
+    ----------
+    session : Session
+        The session used to access eLabFTW.
+    expid : int
+        The id of the experiment in eLabFTW.
+
+    """
+
+    def __init__(self, session: Session, expid: int):
+        self.session = session
+        self.id = expid
+
+    def __repr__(self):
+        return 'Experiment(%r, id=%r)' % (self.session, self.id)
+
+
+def connect(host: str, apikey: str, verify_ssl: bool=True,
+            cache_ttl: float=30.0, cache_size: int=128,
+            file_cache_dir: str=None, file_cache_size: int=2**30,
+            pool_size: int=16, pool_block: bool=False,
+            connect_timeout: float=None, read_timeout: float=None,
+            gzip: bool=True, keepalive: bool=True,
+            retry_policy: RetryPolicy=None):
     """Connect to eLabFTW server API.
     
     Parameters
@@ -40,37 +1291,104 @@ def connect(host: str, apikey: str, verify_ssl: bool=True):
         API key to be used in order to access the eLabFTW data.
     verify_ssl : bool, optional
         If True, SSL certificates are verified.
+    cache_ttl : float, optional
+        Time in seconds for which fetched experiment records and
+        upload listings are reused by subsequent functions; extra field
+        schemas are kept until they are updated by a read or write.
+        If 0, nothing is cached and every call fetches the data from
+        the server.
+        The default is 30.
+    cache_size : int, optional
+        Maximum number of experiments for which records and upload
+        listings are kept in the cache.
+        The default is 128.
+    file_cache_dir : str, optional
+        A local directory in which downloaded files are kept, so that
+        unchanged files are not downloaded again (also in later sessions).
+        If None, files are always downloaded.
+        The default is None.
+    file_cache_size : int, optional
+        Maximum total size of the files in file_cache_dir in bytes; the
+        least recently used files are removed first. Larger files are
+        not cached.
+        The default is 2**30 (1 GiB).
+    pool_size : int, optional
+        Maximum number of connections to the server kept open for reuse,
+        which should be at least the number of threads accessing the
+        server in parallel.
+        The default is 16.
+    pool_block : bool, optional
+        If True, a request waits for a free connection if pool_size 
+        connections are in use, instead of opening an additional one.
+        The default is False.
+    connect_timeout : float, optional
+        Timeout in seconds for establishing a connection to the server.
+        If None, there is no timeout.
+        The default is None.
+    read_timeout : float, optional
+        Timeout in seconds for waiting for data from the server.
+        If None, there is no timeout.
+        The default is None.
+    gzip : bool, optional
+        If True, the server is allowed to send compressed responses.
+        The default is True.
+    keepalive : bool, optional
+        If True, connections are kept open for subsequent requests and
+        TCP keep-alive is enabled for them; if False, a new connection is
+        used for each request.
+        The default is True.
+    retry_policy : RetryPolicy, optional
+        The policy for repeating requests which failed because of a 
+        temporary problem, e.g. a connection error or an overloaded server.
+        If None, RetryPolicy() is used, which repeats requests up to 3
+        times; RetryPolicy(max_retries=0) disables retries.
+        The default is None.
 
     Returns
     -------
-    None.
+    Session
+        The session object of the new connection, which is used by all
+        functions unless another session is given (see Session).
 
     """
     
-    global __APICLIENT__
+    global __SESSION__
+
+    # the new session is used by default, so close the previous one
+    session = Session(host, apikey, verify_ssl, cache_ttl, cache_size,
+                      file_cache_dir, file_cache_size, pool_size, pool_block,
+                      connect_timeout, read_timeout, gzip, keepalive,
+                      retry_policy)
+    if __SESSION__ is not None:
+        __SESSION__.close()
+    __SESSION__ = session
+    return session
     
-    # configure elabftw access
-    conf = elabapi_python.Configuration()
-    conf.api_key['api_key'] = apikey
-    conf.api_key_prefix['api_key'] = 'Authorization'
-    if 'api' in host:
-        conf.host = host
-    else:
-        if host[-1] == '/':
-            conf.host = host + 'api/v2'
-        else:
-            conf.host = host + '/api/v2'
-    conf.debug = False
-    conf.verify_ssl = verify_ssl
-    
-    # connect to api
-    __APICLIENT__ = elabapi_python.ApiClient(conf)
-    __APICLIENT__.set_default_header(header_name='Authorization', 
-                                     header_value=apikey)
     
+def _set_request_timeout(apiclient, timeout: tuple):
+    # the generated api passes no timeout to urllib3 unless given for
+    # each call, which disables the timeout of the pool; so use timeout
+    # as default for all requests of apiclient
+    rest_client = apiclient.rest_client
+    request = rest_client.request
     
+    def request_with_timeout(*args, _request_timeout=None, **kwargs):
+        if _request_timeout is None:
+            _request_timeout = timeout
+        return request(*args, _request_timeout=_request_timeout, **kwargs)
+    rest_client.request = request_with_timeout
+
+
+def _close_apiclient(apiclient):
+    # close all pooled connections and the worker threads of the client
+    apiclient.rest_client.pool_manager.clear()
+    apiclient.pool.close()
+    apiclient.pool.join()
+
+
 def disconnect():
-    """Disconnect from the eLabFTW server API
+    """Disconnect from the eLabFTW server API and close all
+    connections of the session established by connect().
     
     Returns
     -------
@@ -78,27 +1396,199 @@ def disconnect():
 
     """
     
-    global __APICLIENT__
-    __APICLIENT__ = None
+    global __SESSION__
+    if __SESSION__ is not None:
+        __SESSION__.close()
+    __SESSION__ = None
+
+
+def clear_cache(expid: int=None, files: bool=False, session: Session=None):
+    """Discard cached experiment records and upload listings, e.g. after
+    an experiment has been modified outside of pyelabdata.
+
+    Parameters
+    ----------
+    expid : int, optional
+        The id of the experiment whose cached data should be discarded.
+        If None, the cached data of all experiments is discarded.
+        The default is None.
+    files : bool, optional
+        If True, all files in the local file cache are removed as well.
+        The default is False.
+    session : Session, optional
+        The session whose caches are cleared.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    if session is None:
+        session = __SESSION__
+    if session is not None:
+        session.clear_cache(expid, files)
+
+
+def cache_info(session: Session=None):
+    """Return statistics of the caches used by pyelabdata.
+
+    Parameters
+    ----------
+    session : Session, optional
+        The session whose caches are described.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    dictionary
+        Returns a dictionary with the entries 'experiments', 'uploads',
+        'tables', 'schemas' and 'files', each containing a dictionary with the number of
+        cached entries, hits and misses as well as the size limits;
+        'files' is None if no file cache is used.
+
+    """
+
+    return __get_session(session).cache_info()
 
 
-def get_teamid():
+def retry_info(session: Session=None):
+    """Return statistics of the requests to the eLabFTW server which
+    were repeated because of temporary problems (see RetryPolicy).
+
+    Parameters
+    ----------
+    session : Session, optional
+        The session whose requests are described.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    dictionary
+        Returns a dictionary with the total number of 'retries', the 
+        number of 'retried_requests', the number of 'failed_requests', 
+        which failed although they were repeated, and the number of 
+        retries for each reason (http status or exception) in 'reasons'.
+
+    """
+
+    return __get_session(session).retry_info()
+
+
+def __get_session(session: Session=None) -> Session:
+    # the given session or the one established by connect()
+    if session is None:
+        session = __SESSION__
+    if session is None or session.api_client is None:
+        raise RuntimeError('Not connected to eLabFTW server')
+    return session
+
+
+def get_session():
+    """Return the session object of the current connection.
+
+    Returns
+    -------
+    Session
+        The session object returned by connect().
+
+    """
+    return __get_session()
+
+
+def get_teamid(session: Session=None):
     """Return the team id associated with the api key used.
+    The team id is fetched once per session (see Session.refresh()).
+
+    Parameters
+    ----------
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
     The team id associated with the api key used.
 
     """
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    teams_api = elabapi_python.TeamsApi(__APICLIENT__)
-    return teams_api.read_team('current').id
+    return __get_session(session).teamid
 
 
+def iter_experiments(searchstring: str='', tags=[], only_current_team: bool=True,
+                     list_keys=['id'], page_size: int=100,
+                     session: Session=None):
+    """Iterate over all experiments within the team associated 
+    with the api key used that contain searchstring
+    in title, body or elabid and that match the tags.
+    The experiments are fetched from the server page by page while
+    iterating, so that the first results are available immediately.
+
+    Parameters
+    ----------
+    searchstring: str, optional
+        A string that needs to be contained in the title, body or elabid
+        of the experiments.
+        The default is ''.
+    tags : list, optional
+        A list of tags for which experiments should be searched.
+        The default is an empty list.
+    only_current_team : bool, optional
+        If True, only experiments from the current team will be listed.
+        The default is True.
+    list_keys : list, optional
+        A list of keys to include in the returned experiment data.
+        The default is ['id'].
+    page_size : int, optional
+        The number of experiments fetched with each request.
+        The default is 100.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Yields
+    ------
+    The value of the key, if list_keys contains only one key, otherwise
+    a dictionary with the requested keys for each experiment.
+
+    """
+
+    session = __get_session(session)
+    exp_api = elabapi_python.ExperimentsApi(session.api_client)
+
+    # let the server restrict the search to the team (scope 2)
+    # if only experiments of the current team are requested
+    params = {'q': searchstring, 'tags': tags, 'limit': page_size}
+    teamid = None
+    if only_current_team:
+        params['scope'] = 2
+        teamid = session.teamid
+    
+    offset = 0
+    while True:
+        exps = exp_api.read_experiments(offset=offset, **params)
+        for exp in exps:
+            if exp.team == teamid or not only_current_team:
+                if len(list_keys) == 1:
+                    yield getattr(exp, list_keys[0])
+                else:
+                    expdata = {}
+                    for key in list_keys:
+                        expdata[key] = getattr(exp, key)
+                    yield expdata
+        if len(exps) < page_size:
+            break
+        offset += page_size
+
+
+@_traced
 def list_experiments(searchstring: str='', tags=[], only_current_team: bool=True,
-                     list_keys=['id']):
+                     list_keys=['id'], session: Session=None):
     """Return a list of all experiments within the team associated 
     with the api key used that contain searchstring
     in title, body or elabid and that match the tags.
@@ -118,6 +1608,10 @@ def list_experiments(searchstring: str='', tags=[], only_current_team: bool=True
     list_keys : list, optional
         A list of keys to include in the returned experiment data.
         The default is ['id'].
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -125,28 +1619,12 @@ def list_experiments(searchstring: str='', tags=[], only_current_team: bool=True
 
     """
 
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
+    return list(iter_experiments(searchstring, tags, only_current_team,
+                                 list_keys, page_size=1000, session=session))
 
-    exps = exp_api.read_experiments(q=searchstring, tags=tags, limit=9999)
-    
-    teamid = get_teamid()
-    explist = []
-    for exp in exps:
-        if exp.team == teamid or not only_current_team:
-            if len(list_keys) == 1:
-                explist.append(getattr(exp, list_keys[0]))
-            else:
-                expdata = {}
-                for key in list_keys:
-                    expdata[key] = getattr(exp, key)
-                explist.append(expdata)
-    return explist
 
-
-def open_experiment(expid: int, returndata: bool=False):
+@_traced
+def open_experiment(expid: int, returndata: bool=False, session: Session=None):
     """Open an experiment on eLabFTW.
     This experiment will be used for all subsequent commands 
     (unless otherwise specified.)
@@ -159,6 +1637,10 @@ def open_experiment(expid: int, returndata: bool=False):
         If True, open_experiment will return a dictionary containing
         the experiment's metadata.
         The default is False
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -166,42 +1648,111 @@ def open_experiment(expid: int, returndata: bool=False):
 
     """
 
-    global __APICLIENT__
-    global __EXPID__
-    __EXPID__ = expid
+    session = __get_session(session)
+    session.expid = expid
     
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
-    
-    # fetch experiment
-    exp = exp_api.get_experiment(__EXPID__)
+    # fetch experiment, bypassing the cache to start with a fresh record
+    exp = __get_experiment(session, expid, use_cache=False)
     if returndata:
-        return exp
+        # a copy, so that changes by the caller do not affect the cache
+        return copy.deepcopy(exp)
 
 
-def close_experiment():
+def close_experiment(session: Session=None):
     """Close experiment.
     Subsequent commands will not further operate on the experiment.
-    
+
+    Parameters
+    ----------
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
     Returns
     -------
     None.
 
     """
 
-    global __EXPID__
-    __EXPID__ = None
+    if session is None:
+        session = __SESSION__
+    if session is not None:
+        session.expid = None
 
 
 ### Read experiment data ###    
     
     
-def __conv_df_to_np(df: pd.DataFrame) -> dict:
-    """Convert a pandas dataframe to a dictionary of numpy arrays
-    for each column with keys corresponding to the column headings.
-    In case of duplicate column headings, a consecutive number is
-    appended.
+def __get_experiment(session: Session, expid: int, use_cache: bool=True):
+    # reuse a recently fetched record if available
+    if use_cache:
+        exp = session._expcache.get(expid)
+        if exp is not None:
+            return exp
+
+    exp_api = elabapi_python.ExperimentsApi(session.api_client)
+    exp = exp_api.get_experiment(expid)
+    session._expcache.put(expid, exp)
+    __update_field_schema(session, expid, exp.metadata)
+    return exp
+
+
+def __field_schema(metadata) -> dict:
+    # type, units and group of each extra field in metadata
+    if isinstance(metadata, str) or metadata is None:
+        metadata = _loads_metadata(metadata)
+    groups = {group['id']: group['name'] for group in 
+              metadata.get('elabftw', {}).get('extra_fields_groups', [])}
+    schema = {}
+    for fieldname, field in metadata.get('extra_fields', {}).items():
+        schema[fieldname] = {key: field[key] for key in 
+                             ('type', 'unit', 'units', 'group_id')
+                             if key in field}
+        if field.get('group_id') in groups:
+            schema[fieldname]['groupname'] = groups[field['group_id']]
+    return schema
+
+
+def __update_field_schema(session: Session, expid: int, metadata):
+    try:
+        session._schemacache.put(expid, __field_schema(metadata))
+    except ValueError:
+        session._schemacache.invalidate(expid)
+
+
+def __get_field_schema(session: Session, expid: int) -> dict:
+    schema = session._schemacache.get(expid)
+    if schema is None:
+        schema = __field_schema(__get_experiment(session, expid).metadata)
+        session._schemacache.put(expid, schema)
+    return schema
+
+
+def __unique_names(names) -> list:
+    """Return the column names, appending a consecutive number
+    to the original name in case of duplicates (e.g. a, a_1, a_2)."""
+    unique = []
+    used = set()
+    for name in names:
+        newname = name
+        cno = 0
+        while newname in used:
+            cno += 1
+            newname = '%s_%d' % (name, cno)
+        used.add(newname)
+        unique.append(newname)
+    return unique
+
+
+def __conv_df_to_array(df: pd.DataFrame) -> np.ndarray:
+    """Convert a pandas dataframe to a two-dimensional float array with
+    one column per column of df; the array is stored column by column
+    (Fortran order), so that each column is contiguous.
+    If all columns of df are of type float64 and stored in one block,
+    the returned array is a view of df without copying the data; if 
+    pandas only provides a read-only view (copy-on-write), the data is
+    copied once.
 
     Parameters
     ----------
@@ -210,265 +1761,715 @@ def __conv_df_to_np(df: pd.DataFrame) -> dict:
         
     Returns
     -------
-    dictionary
-        A dictionary of numpy arrays for each column of the parameter df
+    numpy.ndarray
+        A float64 array with shape (rows, columns).
+
+    """
+
+    if all(dtype == np.float64 for dtype in df.dtypes):
+        values = df.to_numpy(dtype=float, copy=False)
+        if values.flags.writeable and values.flags.f_contiguous:
+            return values
+        return np.array(values, order='F')
+    
+    # convert each column only once into a preallocated array
+    values = np.empty(df.shape, dtype=float, order='F')
+    for colno, (_, column) in enumerate(df.items()):
+        values[:, colno] = column.to_numpy()
+    return values
+
+
+def __conv_array(names, values: np.ndarray, datatype: str):
+    """Return the columns of the two-dimensional array values with 
+    the given column names in the form requested by datatype:
+    'np': a dictionary of numpy arrays for each column,
+    'array': a tuple of values and the list of column names,
+    'rec': a numpy record array with a field for each column."""
+    
+    names = __unique_names(names)
+    if datatype == 'np':
+        return dict(zip(names, values.T))
+    elif datatype == 'array':
+        return values, names
+    elif datatype == 'rec':
+        rec = np.empty(values.shape[0], 
+                       dtype=[(str(name), float) for name in names])
+        for field, column in zip(rec.dtype.names, values.T):
+            rec[field] = column
+        return rec.view(np.recarray)
+    else:
+        raise RuntimeError('Wrong datatype')
+
+
+def __conv_df(df: pd.DataFrame, datatype: str):
+    """Return the data of a pandas dataframe in the form requested
+    by datatype ('df', 'np', 'array' or 'rec', see __conv_array)."""
+    
+    if datatype == 'df':
+        return df
+    if datatype not in ('np', 'array', 'rec'):
+        raise RuntimeError('Wrong datatype')
+    return __conv_array(df.columns, __conv_df_to_array(df), datatype)
+
+
+@_traced
+def get_experimentdata(expid: int=None, session: Session=None):
+    """Read and return the record of an experiment
+    stored in eLabFTW.
+    
+    Parameters
+    ----------
+    expid : int, optional
+        The id of the experiment in eLabFTW to be read.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    dictionary
+        Returns the experiment data
+
+    """
+
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
+
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+   
+    # fetch experiment; a copy is returned, so that changes by the
+    # caller do not affect the cached record
+    return copy.deepcopy(__get_experiment(session, expid))
+
+
+@_traced
+def get_maintext(format: str='html', expid: int=None, session: Session=None):
+    """Read and return the main (or body) text of an experiment
+    stored in eLabFTW.
+    
+    Parameters
+    ----------
+    format: str, optional
+        If format is 'html', the content of body_html of the experiment
+        is returned, otherwise the content of body.
+        The default is 'html'.
+    expid : int, optional
+        The id of the experiment in eLabFTW to be read.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    str
+        Returns the main (or body) text
+
+    """
+
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
+
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+   
+    # fetch experiment
+    exp = __get_experiment(session, expid)
+    
+    if format == 'html':
+        return exp.body_html
+    else:
+        return exp.body
+
+
+def __get_table_index(session: Session, expid: int):
+    exp = __get_experiment(session, expid)
+    
+    # parse the body only if it changed since the last call
+    revision = _TableIndex.revision_of(exp.body_html)
+    index = session._tablecache.get(expid)
+    if index is None or index.revision != revision:
+        index = _TableIndex(exp.body_html)
+        session._tablecache.put(expid, index)
+    return index
+
+
+def __read_table(index: _TableIndex, position: int, decimal: str,
+                 thousands: str, header: bool, engine: str):
+    # convert a single table on first use (None if pandas cannot read it)
+    if thousands is None:
+        thousands = '.' if decimal==',' else ','
+    if engine == 'pandas':
+        return index.table(position, decimal, thousands)
+    elif engine == 'native':
+        return index.array(position, decimal, thousands, header)
+    else:
+        raise RuntimeError('Wrong engine')
+
+
+def __conv_table(table, header: bool, datatype: str, engine: str):
+    # leave the cached data untouched
+    if engine == 'native':
+        names, values = table
+        values = values.T.copy(order='F')
+        if datatype == 'df':
+            return pd.DataFrame(values, columns=__unique_names(names))
+        return __conv_array(names, values, datatype)
+    
+    # assign header if requested
+    if header:
+        columns = table.iloc[0]
+        table = table.iloc[1:].copy()
+        table.columns = columns
+    else:
+        table = table.copy()
+    return __conv_df(table, datatype)
+
+
+@_traced
+def get_table_data(tableidx=0, header: bool=True, 
+                   decimal: str='.', thousands: str=None,
+                   datatype: str='np', engine: str='pandas',
+                   expid: int=None, session: Session=None):
+    """Read and return table data from the body text of an experiment 
+    stored in eLabFTW.
+    The tables of the body are parsed only once per revision of the
+    body, so that reading several tables of the same experiment
+    is fast.
+
+    Parameters
+    ----------
+    tableidx : int or str, optional
+        The index of the table to be read; first table has index 0. 
+        If a string is given, the first table whose caption or preceding
+        heading equals (or, if none does, contains) this string is read.
+        The default is 0.
+    header : bool, optional
+        If True, the first table row contains the column names, which
+        are used as headings for the pandas dataframe. 
+        The default is True.
+    decimal: str, optional
+        Character representing the decimal point.
+        The default is '.'.
+    thousands: str, optional
+        Character used to parse thousands.
+        If None, ',' or '.' is used if decimal is '.' or ',', respectively.
+        The default is None.
+    datatype : str, optional
+        'df': return a pandas dataframe,
+        'np': return a dictionary of numpy arrays for each column,
+        'array': return a tuple of a two-dimensional float array
+        (rows, columns; each column is contiguous) and the list of
+        column names,
+        'rec': return a numpy record array with a field for each column.
+        The default is 'np'.
+    engine : str, optional
+        'pandas': parse the table with pandas.read_html,
+        'native': convert the cells directly to float arrays, which is
+        much faster for large numeric tables; cells that are not numbers
+        become NaN and rowspan is not supported.
+        The default is 'pandas'.
+    expid : int, optional
+        The id of the experiment in eLabFTW to be read.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    pandas.dataframe or dictionary
+        Return type depends on the parameter datatype (see above).
+
+    """
+    
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
+
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+   
+    # extract only the selected table
+    index = __get_table_index(session, expid)
+    table = __read_table(index, index.find(tableidx), decimal, thousands,
+                         header, engine)
+    if table is None:
+        raise RuntimeError('Table "' + str(tableidx) + '" cannot be read')
+    return __conv_table(table, header, datatype, engine)
+
+
+@_traced
+def get_all_tables(header: bool=True, decimal: str='.', thousands: str=None,
+                   datatype: str='np', engine: str='pandas', expid: int=None,
+                   session: Session=None):
+    """Read and return the data of all tables in the body text of an
+    experiment stored in eLabFTW, parsing the body only once.
+
+    Parameters
+    ----------
+    header : bool, optional
+        If True, the first row of each table contains the column names.
+        The default is True.
+    decimal: str, optional
+        Character representing the decimal point.
+        The default is '.'.
+    thousands: str, optional
+        Character used to parse thousands.
+        If None, ',' or '.' is used if decimal is '.' or ',', respectively.
+        The default is None.
+    datatype : str, optional
+        'df', 'np', 'array' or 'rec' (see get_table_data()).
+        The default is 'np'.
+    engine : str, optional
+        'pandas' or 'native' (see get_table_data()).
+        The default is 'pandas'.
+    expid : int, optional
+        The id of the experiment in eLabFTW to be read.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    list
+        A list with the data of each table in the order of the body,
+        as returned by get_table_data().
 
     """
+    
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
 
-    data = {}
-    for name, column in df.items():
-        cno = 0
-        while name in data.keys():
-            cno += 1
-            name = name + '_' + str(cno)
-        data[name] = np.array(column.to_numpy(), dtype=float)
-    return data
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+    
+    index = __get_table_index(session, expid)
+    tables = [__read_table(index, position, decimal, thousands, header, engine)
+              for position in range(len(index))]
+    return [__conv_table(table, header, datatype, engine)
+            for table in tables if table is not None]
 
 
-def get_experimentdata(expid: int=None):
-    """Read and return the record of an experiment
-    stored in eLabFTW.
-    
+@_traced
+def list_tables(expid: int=None, session: Session=None):
+    """Return the captions and headings of the tables in the body text
+    of an experiment stored in eLabFTW.
+
     Parameters
     ----------
     expid : int, optional
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
-    dictionary
-        Returns the experiment data
+    list
+        A list with a dictionary for each table containing its 'index',
+        its 'caption' and the text of the 'heading' preceding it
+        (None if not present).
 
     """
-
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
     
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
-   
-    # fetch experiment
-    return exp_api.get_experiment(expid)
-
+    
+    index = __get_table_index(session, expid)
+    return [{'index': idx, 'caption': caption, 'heading': heading}
+            for idx, (caption, heading) 
+            in enumerate(zip(index.captions, index.headings))]
 
-def get_maintext(format: str='html', expid: int=None):
-    """Read and return the main (or body) text of an experiment
+        
+@_traced
+def get_extrafields(fieldname: str=None, expid: int=None,
+                    session: Session=None):
+    """Read and return the extra fields of an experiment
     stored in eLabFTW.
     
     Parameters
     ----------
-    format: str, optional
-        If format is 'html', the content of body_html of the experiment
-        is returned, otherwise the content of body.
-        The default is 'html'.
+    fieldname: str, optional
+        If fieldname is None, a dictionary of all extra fields is returned,
+        otherwise the value of the field specified.
+        The default is None.
     expid : int, optional
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
-    str
-        Returns the main (or body) text
+    str or dictionary
+        Returns either the value of the field specified or a dictionary
+        of all extra fields.
 
     """
 
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
-    
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
    
     # fetch experiment
-    exp = exp_api.get_experiment(expid)
+    exp = __get_experiment(session, expid)
     
-    if format == 'html':
-        return exp.body_html
+    data = _loads_metadata(exp.metadata)['extra_fields']
+    if fieldname is None:
+        return data
     else:
-        return exp.body
+        return _parse_field_value(data[fieldname])
 
 
-def get_table_data(tableidx: int=0, header: bool=True, 
-                   decimal: str='.', thousands: str=None,
-                   datatype: str='np', expid: int=None):   
-    """Read and return table data from the body text of an experiment 
-    stored in eLabFTW.
+@_traced
+def get_extrafield_schema(fieldname: str=None, expid: int=None,
+                          session: Session=None):
+    """Return type, units and group of the extra fields of an experiment.
+    The schema is kept per experiment and updated whenever the experiment
+    is read or its extra fields are written with pyelabdata, so that it
+    usually does not require a request to the server.
 
     Parameters
     ----------
-    tableidx : int, optional
-        The index of the table to be read; first table has index 0. 
-        The default is 0.
-    header : bool, optional
-        If True, the first table row contains the column names, which
-        are used as headings for the pandas dataframe. 
-        The default is True.
-    decimal: str, optional
-        Character representing the decimal point.
-        The default is '.'.
-    thousands: str, optional
-        Character used to parse thousands.
-        If None, ',' or '.' is used if decimal is '.' or ',', respectively.
+    fieldname: str, optional
+        If fieldname is None, a dictionary for all extra fields is returned,
+        otherwise the dictionary of the field specified.
         The default is None.
-    datatype : str, optional
-        'df': return a pandas dataframe,
-        'np': return a dictionary of numpy arrays for each column. 
-        The default is 'np'.
     expid : int, optional
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
-    pandas.dataframe or dictionary
-        Return type depends on the parameter datatype (see above).
+    dictionary
+        For each field a dictionary with the entries 'type' and, if
+        defined, 'unit', 'units', 'group_id' and 'groupname'.
 
     """
-    
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
-    
+
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
-   
-    # fetch experiment
-    exp = exp_api.get_experiment(expid)
     
-    # extract table
-    if thousands is None:
-        thousands = '.' if decimal==',' else ','
-    tables = pd.read_html(StringIO(exp.body_html), decimal=decimal, thousands=thousands)
-    
-    # extract selected table and assign header if requested
-    if header:
-        table = tables[tableidx].iloc[1:]
-        table.columns = tables[tableidx].iloc[0]
+    schema = __get_field_schema(session, expid)
+    if fieldname is None:
+        return {name: dict(field) for name, field in schema.items()}
     else:
-        table = tables[tableidx]
-        
-    # return result
-    if datatype == 'df':
-        return table
-    elif datatype == 'np':
-        return __conv_df_to_np(table)
+        return dict(schema[fieldname])
+
+
+def _parse_field_value(field: dict):
+    # convert the string value of an extra field according to its type
+    value = field['value']
+    if field['type'] == 'number':
+        return float(value)
+    if field['type'] == 'datetime-local':
+        return datetime.fromisoformat(value)
+    if field['type'] == 'date':
+        return dt_date.fromisoformat(value)
+    if field['type'] == 'time':
+        return dt_time.fromisoformat(value)
     else:
-        raise RuntimeError('Wrong datatype')
+        return value
 
         
-def get_extrafields(fieldname: str=None, expid: int=None):
-    """Read and return the extra fields of an experiment
-    stored in eLabFTW.
-    
+def __parse_table_field(field):
+    # typed value of a field for extrafields_table; missing or invalid 
+    # numbers become NaN, other missing values None
+    if field is None:
+        return None
+    try:
+        return _parse_field_value(field)
+    except (ValueError, TypeError, KeyError):
+        return np.nan if field.get('type') == 'number' else None
+
+
+@_traced
+def extrafields_table(experiments, fields=None, datatype: str='df',
+                      max_workers: int=8, session: Session=None):
+    """Read the extra fields of many experiments stored in eLabFTW
+    into one table with a row for each experiment. The experiments are
+    fetched in parallel.
+
     Parameters
     ----------
-    fieldname: str, optional
-        If fieldname is None, a dictionary of all extra fields is returned,
-        otherwise the value of the field specified.
+    experiments : list or str
+        A list of experiment ids or a search string, which is passed
+        to list_experiments() to find the experiments.
+    fields : list, optional
+        The names of the extra fields to be read. If None, all extra 
+        fields found in the experiments are read.
         The default is None.
+    datatype : str, optional
+        'df': return a pandas dataframe with the experiment ids as index,
+        'np': return a dictionary of numpy arrays for each field and
+        the key 'id' for the experiment ids.
+        The default is 'df'.
+    max_workers : int, optional
+        The maximum number of parallel requests to the server.
+        The default is 8.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    pandas.dataframe or dictionary
+        The values of the extra fields converted according to their
+        type (see get_extrafields()); numeric fields are float columns
+        with NaN for missing values, other missing values are None.
+
+    """
+
+    session = __get_session(session)
+    if datatype not in ('df', 'np'):
+        raise RuntimeError('Wrong datatype')
+    if isinstance(experiments, str):
+        experiments = list_experiments(experiments, session=session)
+    expids = list(experiments)
+
+    # fetch experiments in parallel and parse each metadata once
+    def read_fields(expid):
+        metadata = __get_experiment(session, expid).metadata
+        return _loads_metadata(metadata).get('extra_fields', {})
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(_in_span(read_fields), expids))
+
+    if fields is None:
+        fields = list(OrderedDict.fromkeys(
+            fieldname for row in rows for fieldname in row))
+
+    # build columns, numeric fields as float arrays
+    data = {'id': np.array(expids)}
+    for fieldname in fields:
+        column = [__parse_table_field(row.get(fieldname)) for row in rows]
+        types = {row[fieldname].get('type') for row in rows if fieldname in row}
+        if types == {'number'}:
+            data[fieldname] = np.array([np.nan if value is None else value
+                                        for value in column], dtype=float)
+        else:
+            data[fieldname] = np.array(column, dtype=object)
+
+    if datatype == 'np':
+        return data
+    return pd.DataFrame(data).set_index('id')
+
+
+### Read files ###    
+    
+    
+def __get_upload_index(session: Session, expid: int, use_cache: bool=True):
+    # reuse a recently fetched listing if available
+    if use_cache:
+        index = session._uploadcache.get(expid)
+        if index is not None:
+            return index
+
+    # fetch metadata of all uploads and index them
+    uploads_api = elabapi_python.UploadsApi(session.api_client)
+    index = _UploadIndex(uploads_api.read_uploads('experiments', expid))
+    session._uploadcache.put(expid, index)
+    return index
+
+
+def __get_upload(session: Session, expid: int, filename: str,
+                 filename_is_long_name: bool=False, use_cache: bool=True):
+    index = __get_upload_index(session, expid, use_cache)
+    uploadid = index.find(filename, filename_is_long_name)
+    if uploadid is None and use_cache:
+        # the cached listing may be outdated, so look again in a fresh one
+        index = __get_upload_index(session, expid, use_cache=False)
+        uploadid = index.find(filename, filename_is_long_name)
+    return None if uploadid is None else index.uploads[uploadid]
+
+
+def __get_upload_id(session: Session, expid: int, filename: str,
+                    filename_is_long_name: bool=False):
+    upload = __get_upload(session, expid, filename, filename_is_long_name)
+    return None if upload is None else upload.id
+
+
+def __open_upload_data(session: Session, expid: int, upload):
+    if upload is None:
+        raise RuntimeError('File not found in eLabFTW experiment')
+
+    # serve unchanged files from the local file cache; files larger than
+    # the whole cache are streamed without caching them
+    filecache = session._filecache
+    if filecache is not None and not filecache.fits(upload):
+        filecache = None
+    if filecache is not None:
+        key = filecache.key(expid, upload)
+        file = filecache.get(key)
+        if file is not None:
+            return file
+
+    # request file data without reading the response body
+    uploads_api = elabapi_python.UploadsApi(session.api_client)
+    response = uploads_api.read_upload(
+        'experiments', expid, upload.id, format='binary', 
+        _preload_content=False)
+
+    if filecache is not None:
+        try:
+            return filecache.store(key, response, upload)
+        finally:
+            response.close()
+
+    # keep the response usable by io wrappers until it is closed explicitly;
+    # the connection is returned to the pool once the body is read
+    response.auto_close = False
+    return response
+
+
+def __open_upload(session: Session, expid: int, filename: str,
+                  filename_is_long_name: bool=False):
+    upload = __get_upload(session, expid, filename, filename_is_long_name)
+    try:
+        return __open_upload_data(session, expid, upload)
+    except elabapi_python.rest.ApiException as e:
+        if e.status != 404:
+            raise
+
+    # the file was removed or replaced since the listing was cached
+    upload = __get_upload(session, expid, filename, filename_is_long_name,
+                          use_cache=False)
+    return __open_upload_data(session, expid, upload)
+
+
+@_traced
+def get_file_data(filename: str, filename_is_long_name: bool=False, expid: int=None,
+                  session: Session=None):
+    """Read and return binary data from a file attached to 
+    an experiment stored in eLabFTW.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the file to be read from the experiment.
+    filename_is_long_name: bool
+        The value of filename is the long_name stored used in eLabFTW.
+        The default is False.
     expid : int, optional
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
-    str or dictionary
-        Returns either the value of the field specified or a dictionary
-        of all extra fields.
+    bytes
+        Returns the binary data of the specified file.
 
     """
 
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
-    
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
-   
-    # fetch experiment
-    exp = exp_api.get_experiment(expid)
     
-    data = json.loads(exp.metadata)['extra_fields']
-    if fieldname is None:
-        return data
-    else:
-        value = data[fieldname]['value']
-        if data[fieldname]['type'] == 'number':
-            return float(value)
-        if data[fieldname]['type'] == 'datetime-local':
-            return datetime.fromisoformat(value)
-        if data[fieldname]['type'] == 'date':
-            return dt_date.fromisoformat(value)
-        if data[fieldname]['type'] == 'time':
-            return dt_time.fromisoformat(value)
-        else:
-            return value
+    # fetch file data
+    response = __open_upload(session, expid, filename, filename_is_long_name)
+    try:
+        return response.read()
+    finally:
+        response.close()
 
-        
-### Read files ###    
-    
-    
-def __get_upload_id(expid: int, filename: str):
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    uploads_api = elabapi_python.UploadsApi(__APICLIENT__)
 
-    # fetch metadata of all uploads and search for filename
-    uploads = uploads_api.read_uploads('experiments', expid)
-    uploadid = None
-    for upload in uploads:
-        if upload.real_name == filename:
-            uploadid = upload.id
-            break   
-    return uploadid
+@_traced
+def open_file_stream(filename: str, filename_is_long_name: bool=False,
+                     buffer_size: int=1048576, expid: int=None,
+                     session: Session=None):
+    """Open a file attached to an experiment stored in eLabFTW for
+    reading. The data is read incrementally from the server, so that
+    large files can be processed without holding them in memory.
 
+    Parameters
+    ----------
+    filename : str
+        The filename of the file to be read from the experiment.
+    filename_is_long_name: bool
+        The value of filename is the long_name stored used in eLabFTW.
+        The default is False.
+    buffer_size : int, optional
+        The size of the read buffer in bytes.
+        The default is 1048576 (1 MiB).
+    expid : int, optional
+        The id of the experiment in eLabFTW to be read.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
-def __get_upload_id_by_long_name(expid: int, long_name: str):
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    uploads_api = elabapi_python.UploadsApi(__APICLIENT__)
+    Returns
+    -------
+    io.BufferedReader
+        Returns a binary file object, which should be closed after use
+        (e.g. by using it in a with statement).
 
-    # fetch metadata of all uploads and search for filename
-    uploads = uploads_api.read_uploads('experiments', expid)
-    uploadid = None
-    for upload in uploads:
-        if upload.long_name == long_name:
-            uploadid = upload.id
-            break   
-    return uploadid
+    """
 
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
 
-def get_file_data(filename: str, filename_is_long_name: bool=False, expid: int=None):   
-    """Read and return binary data from a file attached to 
-    an experiment stored in eLabFTW.
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+
+    response = __open_upload(session, expid, filename, filename_is_long_name)
+    return BufferedReader(response, buffer_size=buffer_size)
+
+
+def iter_file_chunks(filename: str, filename_is_long_name: bool=False,
+                     chunk_size: int=1048576, expid: int=None,
+                     session: Session=None):
+    """Iterate over the binary data of a file attached to an experiment
+    stored in eLabFTW in chunks, which are downloaded as needed.
 
     Parameters
     ----------
@@ -477,49 +2478,103 @@ def get_file_data(filename: str, filename_is_long_name: bool=False, expid: int=N
     filename_is_long_name: bool
         The value of filename is the long_name stored used in eLabFTW.
         The default is False.
+    chunk_size : int, optional
+        The maximum size of the chunks in bytes.
+        The default is 1048576 (1 MiB).
     expid : int, optional
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
-    Returns
-    -------
+    Yields
+    ------
     bytes
-        Returns the binary data of the specified file.
+        The consecutive chunks of the binary data of the specified file.
 
     """
 
-    global __APICLIENT__   
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    uploads_api = elabapi_python.UploadsApi(__APICLIENT__)
-    
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
-    
-    if filename_is_long_name:
-        uploadid = __get_upload_id_by_long_name(expid, filename)
-    else:
-        uploadid = __get_upload_id(expid, filename)
-          
-    if uploadid is None:
-        raise RuntimeError('File not found in eLabFTW experiment')
-    else:
-        # fetch file data
-        return uploads_api.read_upload(
-            'experiments', expid, uploadid, format='binary', 
-            _preload_content=False).data
+
+    response = __open_upload(session, expid, filename, filename_is_long_name)
+    try:
+        for chunk in iter(lambda: response.read(chunk_size), b''):
+            yield chunk
+    finally:
+        response.close()
+
+
+@_traced
+def get_file_to_path(filename: str, path: str, filename_is_long_name: bool=False,
+                     chunk_size: int=1048576, expid: int=None,
+                     session: Session=None):
+    """Download a file attached to an experiment stored in eLabFTW
+    directly to a local file.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the file to be read from the experiment.
+    path : str
+        The path of the local file to be written. If path is an existing
+        directory, the file is stored in this directory under its
+        filename in eLabFTW. An existing file is overwritten.
+    filename_is_long_name: bool
+        The value of filename is the long_name stored used in eLabFTW.
+        The default is False.
+    chunk_size : int, optional
+        The size of the chunks in bytes in which the data is written.
+        The default is 1048576 (1 MiB).
+    expid : int, optional
+        The id of the experiment in eLabFTW to be read.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    str
+        Returns the path of the local file.
+
+    """
+
+    if os.path.isdir(path):
+        path = os.path.join(path, os.path.basename(filename))
+
+    # write to a temporary file first so that an interrupted download
+    # does not leave a truncated file behind
+    tmppath = path + '.part'
+    try:
+        with open_file_stream(filename, filename_is_long_name,
+                              buffer_size=chunk_size, expid=expid,
+                              session=session) as stream, \
+                open(tmppath, 'wb') as file:
+            shutil.copyfileobj(stream, file, chunk_size)
+        os.replace(tmppath, path)
+    finally:
+        if os.path.exists(tmppath):
+            os.remove(tmppath)
+    return path
 
     
+@_traced
 def get_file_csv_data(filename: str, 
                       filename_is_long_name: bool=False,
                       header: bool=True, sep: str=',', 
                       decimal: str='.', thousands: str=None,
-                      datatype: str='np', expid: int=None):   
+                      datatype: str='np', expid: int=None,
+                      session: Session=None):
     """Read and return data from a csv-like text file attached to 
     an experiment stored in eLabFTW.
 
@@ -532,7 +2587,8 @@ def get_file_csv_data(filename: str,
         The default is False.
     header : bool, optional
         If True, the first table row contains the column names, which
-        are used as headings for the pandas dataframe. 
+        are used as headings for the pandas dataframe. If False, the
+        first row contains data and the columns are numbered from 0.
         The default is True.
     sep : str, optional
         The column separator used in the file.
@@ -546,40 +2602,335 @@ def get_file_csv_data(filename: str,
         The default is None.
     datatype : str, optional
         'df': return a pandas dataframe,
-        'np': return a dictionary of numpy arrays for each column. 
+        'np': return a dictionary of numpy arrays for each column,
+        'array': return a tuple of a two-dimensional float array
+        (rows, columns; each column is contiguous) and the list of
+        column names,
+        'rec': return a numpy record array with a field for each column.
+        The default is 'np'.
+    expid : int, optional
+        The id of the experiment in eLabFTW to be read.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    pandas.dataframe or dictionary
+        Return type depends on the parameter datatype (see above).
+
+    """
+
+    # stream file data into the parser and extract data
+    if thousands is None:
+        thousands = '.' if decimal==',' else ','
+    with open_file_stream(filename, filename_is_long_name, expid=expid,
+                          session=session) as stream, _span('read_csv'):
+        df = pd.read_csv(TextIOWrapper(stream, encoding='utf-8'), sep=sep, 
+                         header=(0 if header else None),
+                         decimal=decimal, thousands=thousands)
+
+    # return result
+    return __conv_df(df, datatype)
+
+
+
+class _PrefixedReader(io.RawIOBase):
+    """Read-only file object returning the bytes prefix followed by
+    the remaining data of the file object stream."""
+
+    def __init__(self, prefix: bytes, stream):
+        super().__init__()
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        return self._stream.readinto(buffer)
+
+
+def __csv_column_names(line: str, sep: str, header: bool) -> list:
+    """Return the column names pandas.read_csv assigns to a file whose
+    first line is line: the names of the header line, numbered
+    'Unnamed: i' if empty and 'a.1', 'a.2' if duplicate, or the column
+    numbers if there is no header line."""
+    fields = next(csv.reader([line.rstrip('\r\n')], delimiter=sep), [])
+    if not header:
+        return list(range(len(fields)))
+    names = []
+    counts = {}
+    for colno, name in enumerate(fields):
+        if name == '':
+            name = 'Unnamed: %d' % colno
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = '%s.%d' % (name, count)
+            count = counts.get(name, 0)
+        counts[name] = count + 1
+        names.append(name)
+    return names
+
+
+def __iter_arrow_csv_tables(stream, chunksize: int, header: bool, sep: str,
+                            decimal: str):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    # read the column names like pandas and parse all columns as floats,
+    # since pyarrow would guess the types from the first block only
+    firstline = stream.readline()
+    names = __csv_column_names(firstline.decode('utf-8-sig'), sep, header)
+    if not header:
+        stream = _PrefixedReader(firstline, stream)
+    columns = ['f%d' % colno for colno in range(len(names))]
+    reader = pa_csv.open_csv(
+        stream, read_options=pa_csv.ReadOptions(column_names=columns),
+        parse_options=pa_csv.ParseOptions(delimiter=sep),
+        convert_options=pa_csv.ConvertOptions(
+            decimal_point=decimal,
+            column_types={column: pa.float64() for column in columns}))
+
+    # pyarrow reads blocks of bytes, so regroup them into chunks of rows
+    batches = []
+    nrows = 0
+    for batch in reader:
+        batches.append(batch)
+        nrows += batch.num_rows
+        while nrows >= chunksize:
+            table = pa.Table.from_batches(batches)
+            yield table.slice(0, chunksize), names
+            table = table.slice(chunksize)
+            batches = table.to_batches()
+            nrows = table.num_rows
+    if nrows > 0:
+        yield pa.Table.from_batches(batches), names
+
+
+def __arrow_to_df(table, names: list) -> pd.DataFrame:
+    df = table.to_pandas()
+    df.columns = names
+    return df
+
+
+def iter_file_csv_chunks(filename: str, 
+                         filename_is_long_name: bool=False,
+                         chunksize: int=100000,
+                         header: bool=True, sep: str=',', 
+                         decimal: str='.', thousands: str=None,
+                         datatype: str='np', engine: str='pandas',
+                         expid: int=None, session: Session=None):
+    """Iterate over the data from a csv-like text file attached to 
+    an experiment stored in eLabFTW in chunks of rows. The file is
+    downloaded and parsed while iterating, so that files larger than
+    the available memory can be processed.
+
+    Parameters
+    ----------
+    filename : str
+        The filename of the file to be read from the experiment.
+    filename_is_long_name: bool
+        The value of filename is the long_name stored used in eLabFTW.
+        The default is False.
+    chunksize : int, optional
+        The number of rows per chunk; the last chunk may be shorter.
+        The default is 100000.
+    header : bool, optional
+        If True, the first table row contains the column names, which
+        are used as headings for the pandas dataframe. If False, the
+        first row contains data and the columns are numbered from 0.
+        The default is True.
+    sep : str, optional
+        The column separator used in the file.
+        The default is ','.
+    decimal: str, optional
+        Character representing the decimal point.
+        The default is '.'.
+    thousands: str, optional
+        Character used to parse thousands.
+        If None, ',' or '.' is used if decimal is '.' or ',', respectively.
+        The default is None.
+    datatype : str, optional
+        'df', 'np', 'array' or 'rec' (see get_file_csv_data()).
         The default is 'np'.
+    engine : str, optional
+        'pandas': parse the file with pandas.read_csv,
+        'pyarrow': parse the file with pyarrow (needs to be installed),
+        which is faster but ignores the parameter thousands and reads
+        all columns as float numbers.
+        Both engines assign the same column names.
+        The default is 'pandas'.
     expid : int, optional
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Yields
+    ------
+    pandas.dataframe or dictionary
+        The consecutive chunks of the data; the type depends on the
+        parameter datatype (see above).
+
+    """
+
+    if datatype not in ('df', 'np', 'array', 'rec'):
+        raise RuntimeError('Wrong datatype')
+
+    if engine not in ('pandas', 'pyarrow'):
+        raise RuntimeError('Wrong engine')
+
+    with open_file_stream(filename, filename_is_long_name, expid=expid,
+                          session=session) as stream:
+        if engine == 'pyarrow':
+            chunks = (__arrow_to_df(table, names) for table, names in 
+                      __iter_arrow_csv_tables(stream, chunksize, header,
+                                              sep, decimal))
+        else:
+            if thousands is None:
+                thousands = '.' if decimal==',' else ','
+            chunks = pd.read_csv(TextIOWrapper(stream, encoding='utf-8'), sep=sep, 
+                                 header=(0 if header else None),
+                                 decimal=decimal, thousands=thousands,
+                                 chunksize=chunksize)
 
-    Returns
-    -------
-    pandas.dataframe or dictionary
-        Return type depends on the parameter datatype (see above).
+        for df in chunks:
+            yield __conv_df(df, datatype)
 
-    """
 
-    # fetch file data
-    filedata = get_file_data(filename, filename_is_long_name, expid).decode('utf-8')
+class _RangeReader(io.RawIOBase):
+    """Read-only, seekable file object for an upload, which fetches
+    only the blocks of the file that are actually read by means of
+    HTTP range requests. Recently read blocks are kept in memory.
 
-    # extract data
-    if thousands is None:
-        thousands = '.' if decimal==',' else ','
-    df = pd.read_csv(StringIO(filedata), sep=sep, 
-                     header=(0 if header else 'infer'),
-                     decimal=decimal, thousands=thousands)
+    Parameters
+    ----------
+    apiclient : elabapi_python.ApiClient
+        The client connected to the eLabFTW server.
+    expid : int
+        The id of the experiment.
+    uploadid : int
+        The id of the upload.
+    block_size : int
+        The size of the blocks fetched from the server in bytes.
+    max_blocks : int
+        Maximum number of blocks kept in memory.
 
-    # return result
-    if datatype == 'df':
-        return df
-    elif datatype == 'np':
-        return __conv_df_to_np(df)
-    else:
-        raise RuntimeError('Wrong datatype')
+    """
+
+    def __init__(self, apiclient, expid: int, uploadid: int,
+                 block_size: int, max_blocks: int):
+        super().__init__()
+        self.apiclient = apiclient
+        self.expid = expid
+        self.uploadid = uploadid
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.size = None
+        self._pos = 0
+        self._blocks = OrderedDict()
+
+    def __fetch(self, start: int, end: int):
+        # ranges refer to the uncompressed file, so compression is
+        # disabled (call_api would override it by the default headers)
+        headers = dict(self.apiclient.default_headers)
+        headers['Range'] = 'bytes=%d-%d' % (start, end - 1)
+        headers['Accept-Encoding'] = 'identity'
+        response = self.apiclient.request(
+            'GET', '%s/experiments/%d/uploads/%d' % (
+                self.apiclient.configuration.host, self.expid, self.uploadid),
+            query_params=[('format', 'binary')], headers=headers,
+            _preload_content=False)
+        try:
+            if response.status != 206:
+                return None, None
+            size = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+            return response.read(), int(size) if size.isdigit() else None
+        finally:
+            response.close()
+
+    def probe(self):
+        """Fetch the first block and return True if the server supports
+        range requests."""
+        try:
+            data, size = self.__fetch(0, self.block_size)
+        except elabapi_python.rest.ApiException:
+            # e.g. 416 for an empty file or a proxy rejecting ranges
+            return False
+        if data is None or size is None:
+            return False
+        self.size = size
+        self._blocks[0] = data
+        return True
+
+    def __block(self, blockno: int):
+        data = self._blocks.get(blockno)
+        if data is None:
+            start = blockno * self.block_size
+            data, _ = self.__fetch(start, min(start + self.block_size, self.size))
+            if data is None:
+                raise OSError('Range request for upload failed')
+            self._blocks[blockno] = data
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(blockno)
+        return data
 
-            
-def get_file_hdf5_data(filename: str, filename_is_long_name: bool=False, expid: int=None):   
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset: int, whence: int=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast('B')
+        nbytes = 0
+        while nbytes < len(view) and self._pos < self.size:
+            blockno, offset = divmod(self._pos, self.block_size)
+            data = self.__block(blockno)[offset:offset + len(view) - nbytes]
+            view[nbytes:nbytes + len(data)] = data
+            nbytes += len(data)
+            self._pos += len(data)
+        return nbytes
+
+
+def __remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        # still opened (on Windows), so try again at exit
+        atexit.register(__remove_file, path)
+
+
+@_traced
+def get_file_hdf5_data(filename: str, filename_is_long_name: bool=False,
+                       access: str='memory', block_size: int=262144,
+                       expid: int=None, session: Session=None):
     """Read and return data from a hdf5 file attached to 
     an experiment stored in eLabFTW.
 
@@ -590,10 +2941,26 @@ def get_file_hdf5_data(filename: str, filename_is_long_name: bool=False, expid:
     filename_is_long_name: bool
         The value of filename is the long_name stored used in eLabFTW.
         The default is False.
+    access : str, optional
+        'memory': download the file into memory,
+        'file': download the file to the local file cache (see connect())
+        or a temporary file, from which only the parts actually read are
+        loaded into memory,
+        'lazy': download only the blocks of the file that are actually
+        read (requires HTTP range requests to be supported by the server,
+        otherwise 'file' is used).
+        The default is 'memory'.
+    block_size : int, optional
+        The size of the blocks in bytes fetched by 'lazy' access.
+        The default is 262144 (256 KiB).
     expid : int, optional
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -602,21 +2969,265 @@ def get_file_hdf5_data(filename: str, filename_is_long_name: bool=False, expid:
 
     """
 
-    # fetch file data
-    filestream = BytesIO(get_file_data(filename, filename_is_long_name, expid))
+    if access == 'memory':
+        # fetch file data
+        filestream = BytesIO(get_file_data(filename, filename_is_long_name,
+                                           expid, session=session))
+
+        # open and return hdf5
+        with _span('h5py_open', access=access):
+            return h5py.File(filestream, 'r')
+
+    if access not in ('file', 'lazy'):
+        raise RuntimeError('Wrong access mode')
+
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
+
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+
+    if access == 'lazy':
+        upload = __get_upload(session, expid, filename, filename_is_long_name)
+        if upload is None:
+            raise RuntimeError('File not found in eLabFTW experiment')
+        # h5py reads in small pieces, so keep at least 64 MiB of blocks
+        reader = _RangeReader(session.api_client, expid, upload.id, block_size,
+                              max(64 * 2**20 // block_size, 1))
+        if reader.probe():
+            with _span('h5py_open', access=access):
+                return h5py.File(reader, 'r')
+
+    # download to the file cache and open the cached file
+    upload = None
+    if session._filecache is not None:
+        upload = __get_upload(session, expid, filename, filename_is_long_name)
+    if upload is not None and session._filecache.fits(upload):
+        file = __open_upload(session, expid, filename, filename_is_long_name)
+        if isinstance(file, io.FileIO):
+            with _span('h5py_open', access='file'):
+                try:
+                    hdf = h5py.File(file.name, 'r')
+                except FileNotFoundError:
+                    # removed from the cache meanwhile, so read the file
+                    # object, which stays valid until h5py closes it
+                    return h5py.File(file, 'r')
+                except BaseException:
+                    file.close()
+                    raise
+            file.close()
+            return hdf
+        file.close()
+
+    # download to a temporary file, which is removed after opening
+    # (on Windows, the file is removed when the program exits)
+    fd, path = tempfile.mkstemp(suffix='.h5')
+    os.close(fd)
+    try:
+        get_file_to_path(filename, path, filename_is_long_name, expid=expid,
+                         session=session)
+        with _span('h5py_open', access='file'):
+            return h5py.File(path, 'r')
+    finally:
+        __remove_file(path)
+
+
+def get_files_batch(files, filename_is_long_name: bool=False,
+                    max_workers: int=8, session: Session=None):
+    """Read binary data from many files attached to experiments
+    stored in eLabFTW in parallel.
+    
+    The results are returned as soon as the files are downloaded, i.e. 
+    not necessarily in the order of the parameter files. Errors are
+    reported for each file and do not stop the remaining downloads.
 
-    # open and return hdf5
-    return h5py.File(filestream, 'r')
+    Parameters
+    ----------
+    files : list
+        A list of tuples (expid, filename) specifying the files to be read,
+        where expid is the id of the experiment in eLabFTW.
+    filename_is_long_name: bool
+        The filenames are the long_names stored used in eLabFTW.
+        The default is False.
+    max_workers : int, optional
+        The maximum number of parallel requests to the server.
+        The default is 8.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Yields
+    ------
+    dictionary
+        A dictionary for each file with the keys 'expid', 'filename', 
+        'data' (the binary data or None in case of an error) and 'error'
+        (the exception raised or None).
+
+    """
+
+    session = __get_session(session)
+
+    # group files by experiment to fetch each upload listing only once
+    filenames = OrderedDict()
+    for expid, filename in files:
+        filenames.setdefault(expid, []).append(filename)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    try:
+        for expid in filenames:
+            pending[executor.submit(_in_span(__get_upload_index), session,
+                                    expid)] = (expid, None)
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                expid, filename = pending.pop(future)
+                error = future.exception()
+                if filename is not None:
+                    yield {'expid': expid, 'filename': filename,
+                           'data': None if error else future.result(),
+                           'error': error}
+                    continue
+                
+                # upload listing is available, so start the downloads
+                for filename in filenames[expid]:
+                    if error is None:
+                        future = executor.submit(
+                            _in_span(get_file_data), filename,
+                            filename_is_long_name, expid, session=session)
+                        pending[future] = (expid, filename)
+                    else:
+                        yield {'expid': expid, 'filename': filename,
+                               'data': None, 'error': error}
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
 
 
 ### Update experiment data ###
 
 
+def __patch_experiment(session: Session, expid: int, body: dict):
+    exp_api = elabapi_python.ExperimentsApi(session.api_client)
+
+    # the body sets metadata or field values, so repeating it is safe
+    token = __IDEMPOTENT__.set(True)
+    try:
+        exp_api.patch_experiment(id=expid, body=body)
+    except Exception:
+        # the field schema is in an unknown state
+        session._schemacache.invalidate(expid)
+        raise
+    else:
+        if 'metadata' in body:
+            __update_field_schema(session, expid, body['metadata'])
+    finally:
+        __IDEMPOTENT__.reset(token)
+        # the cached record is outdated now (or in an unknown state)
+        session._expcache.invalidate(expid)
+
+
+def __load_metadata(exp) -> dict:
+    if exp.metadata is None:
+        # no metadata yet, then create it
+        metadata = {'extra_fields': {}}
+    else:
+        metadata = _loads_metadata(exp.metadata)
+        if 'extra_fields' not in metadata.keys():
+            metadata['extra_fields'] = {}
+    return metadata
+
+
+def __conv_field_value(value, fieldtype: str):
+    # convert value to the string representation used by eLabFTW
+    if type(value) != str:
+        if fieldtype == 'number':
+            value = str(value)
+        if fieldtype == 'datetime-local':
+            value = datetime.isoformat(value.replace(second=0, microsecond=0))
+        if fieldtype == 'date':
+            value = dt_date.isoformat(value)
+        if fieldtype == 'time':
+            value = dt_time.isoformat(value.replace(second=0, microsecond=0))
+    return value
+
+
+def __guess_field_type(value) -> str:
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return 'number'
+    if isinstance(value, datetime):
+        return 'datetime-local'
+    if isinstance(value, dt_date):
+        return 'date'
+    if isinstance(value, dt_time):
+        return 'time'
+    return 'text'
+
+
+def __get_field_group(metadata: dict, groupname: str) -> int:
+    # no elabftw or extra_fields_groups entries, then create them
+    if 'elabftw' not in metadata.keys():
+        metadata['elabftw'] = {}
+    if 'extra_fields_groups' not in metadata['elabftw'].keys():
+        metadata['elabftw']['extra_fields_groups'] = []
+    groups = metadata['elabftw']['extra_fields_groups']
+    
+    # check if group already exists
+    groupid = [group['id'] for group in groups if group['name']==groupname]
+    if len(groupid) > 0:
+        return groupid[0]
+
+    # create group if not yet existing
+    if len(groups) > 0:
+        groupid = max([group['id'] for group in groups]) + 1
+    else:
+        groupid = 1
+    groups.append({'id': groupid, 'name': groupname})
+    return groupid
+
+
+def __set_field(metadata: dict, fieldname: str, value, fieldtype: str=None,
+                unit: str=None, units=None, description: str=None,
+                groupname: str=None, readonly: bool=None, 
+                required: bool=None):
+    # create the field if necessary and set all given properties;
+    # properties that are None are kept (or not set for new fields)
+    field = metadata['extra_fields'].setdefault(fieldname, {})
+    if fieldtype == 'datetime':
+        fieldtype = 'datetime-local'
+    if fieldtype is not None:
+        field['type'] = fieldtype
+    elif 'type' not in field:
+        field['type'] = 'text'
+    
+    field['value'] = __conv_field_value(value, field['type'])
+    
+    if unit is not None:
+        field['unit'] = unit
+        if units is None and 'units' not in field:
+            units = [unit]
+    if units is not None:
+        field['units'] = units
+    if description is not None:
+        field['description'] = description
+    if groupname is not None:
+        field['group_id'] = __get_field_group(metadata, groupname)
+    if readonly is not None:
+        field['readonly'] = readonly
+    if required is not None:
+        field['required'] = required
+
+
+@_traced
 def create_extrafield(fieldname: str, value, fieldtype: str='text',
                       unit: str=None, units=None, description: str=None,
                       groupname: str=None,
                       readonly: bool=False, required: bool=False,
-                      expid: int=None):
+                      expid: int=None, session: Session=None):
     """Create an extra field in an experiment.
 
     Parameters
@@ -644,6 +3255,10 @@ def create_extrafield(fieldname: str, value, fieldtype: str='text',
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -651,90 +3266,33 @@ def create_extrafield(fieldname: str, value, fieldtype: str='text',
 
     """
 
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
-    
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
    
-    # fetch experiment
-    exp = exp_api.get_experiment(expid)
-    if exp.metadata is None:
-        # no metadata yet, then create it
-        metadata = {'extra_fields': {}}
-    else:
-        metadata = json.loads(exp.metadata)
-        if 'extra_fields' not in metadata.keys():
-            metadata['extra_fields'] = {}
+    # fetch current experiment, since the whole metadata is written back
+    exp = __get_experiment(session, expid, use_cache=False)
+    metadata = __load_metadata(exp)
     
     # check if fieldname already exists
     if fieldname in metadata['extra_fields'].keys():
-        update_extrafield(fieldname, value, expid)
+        update_extrafield(fieldname, value, expid, session=session)
         return
     
-    if groupname is not None:
-        # no elabftw or extra_fields_groups entries, then create them
-        if 'elabftw' not in metadata.keys():
-            metadata['elabftw'] = {}
-        if 'extra_fields_groups' not in metadata['elabftw'].keys():
-            metadata['elabftw']['extra_fields_groups'] = []
-        
-        # check if group already exists
-        groupid = [group['id'] for group in metadata['elabftw']['extra_fields_groups'] 
-                   if group['name']==groupname]
-        groupid = groupid[0] if len(groupid)>0 else None
-
-        # create group if not yet existing
-        if groupid is None:
-            if len(metadata['elabftw']['extra_fields_groups']) > 0:
-                groupid = max([group['id'] for group in metadata['elabftw']['extra_fields_groups']]) + 1
-            else:
-                groupid = 1
-            metadata['elabftw']['extra_fields_groups'].append({'id': groupid, 'name': groupname})
-    
     # create field
-    if fieldtype == 'datetime':
-        fieldtype = 'datetime-local'
-    metadata['extra_fields'][fieldname] = {'type': fieldtype}
-
-    if type(value) != str:
-        if fieldtype == 'number':
-            value = str(value)
-        if fieldtype == 'datetime-local':
-            value = datetime.isoformat(value.replace(second=0, microsecond=0))
-        if fieldtype == 'date':
-            value = dt_date.isoformat(value)
-        if fieldtype == 'time':
-            value = dt_time.isoformat(value.replace(second=0, microsecond=0))
-
-    metadata['extra_fields'][fieldname]['value'] = value
-    
-    if unit is not None:
-        metadata['extra_fields'][fieldname]['unit'] = unit
-        if units is None:
-            units = [unit]
-    if units is not None:
-        metadata['extra_fields'][fieldname]['units'] = units
-    if description is not None:
-        metadata['extra_fields'][fieldname]['description'] = description
-    if groupname is not None:
-        metadata['extra_fields'][fieldname]['group_id'] = groupid
-    if readonly:
-        metadata['extra_fields'][fieldname]['readonly'] = True
-    if required:
-        metadata['extra_fields'][fieldname]['required'] = True
+    __set_field(metadata, fieldname, value, fieldtype, unit, units,
+                description, groupname, readonly or None, required or None)
 
     # save to elabftw
-    exp_api.patch_experiment(expid, body={'metadata': json.dumps(metadata)})
+    __patch_experiment(session, expid, body={'metadata': json.dumps(metadata)})
 
 
-def update_extrafield(fieldname: str, value, expid: int=None):
+@_traced
+def update_extrafield(fieldname: str, value, expid: int=None,
+                      session: Session=None):
     """Update the value of an extra field of an experiment.
 
     Parameters
@@ -747,6 +3305,10 @@ def update_extrafield(fieldname: str, value, expid: int=None):
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -754,37 +3316,27 @@ def update_extrafield(fieldname: str, value, expid: int=None):
 
     """
 
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
-    
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
         
     if type(value) != str:
-        # fetch type of metadatafield
-        exp = exp_api.get_experiment(expid)
-        metadata = json.loads(exp.metadata)
-        fieldtype = metadata['extra_fields'][fieldname]['type']
-
-        if fieldtype == 'number':
-            value = str(value)
-        if fieldtype == 'datetime-local':
-            value = datetime.isoformat(value.replace(second=0, microsecond=0))
-        if fieldtype == 'date':
-            value = dt_date.isoformat(value)
-        if fieldtype == 'time':
-            value = dt_time.isoformat(value.replace(second=0, microsecond=0))
+        # look up type of metadatafield, fetching the experiment
+        # only if the field is not known yet
+        schema = __get_field_schema(session, expid)
+        if fieldname not in schema:
+            __get_experiment(session, expid, use_cache=False)
+            schema = __get_field_schema(session, expid)
+        value = __conv_field_value(value, schema[fieldname]['type'])
         
-    exp_api.patch_experiment(expid, body={'action': 'updatemetadatafield', fieldname: value})
+    __patch_experiment(session, expid, body={'action': 'updatemetadatafield', fieldname: value})
 
     
-def delete_extrafield(fieldname: str, expid: int=None):
+@_traced
+def delete_extrafield(fieldname: str, expid: int=None, session: Session=None):
     """Delete an extra field in an experiment.
 
     Parameters
@@ -795,6 +3347,10 @@ def delete_extrafield(fieldname: str, expid: int=None):
         The id of the experiment in eLabFTW to be read.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -802,33 +3358,328 @@ def delete_extrafield(fieldname: str, expid: int=None):
 
     """
 
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    exp_api = elabapi_python.ExperimentsApi(__APICLIENT__)
-    
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
    
-    # fetch experiment
-    exp = exp_api.get_experiment(expid)
-    metadata = json.loads(exp.metadata)
+    # fetch current experiment, since the whole metadata is written back
+    exp = __get_experiment(session, expid, use_cache=False)
+    metadata = _loads_metadata(exp.metadata)
       
     del metadata['extra_fields'][fieldname]
 
     # save to elabftw
-    exp_api.patch_experiment(expid, body={'metadata': json.dumps(metadata)})
+    __patch_experiment(session, expid, body={'metadata': json.dumps(metadata)})
+
+
+__FIELDSPEC_KEYS = ('value', 'fieldtype', 'unit', 'units', 'description',
+                    'groupname', 'readonly', 'required')
+
+
+def _apply_extrafields(metadata: dict, fields: dict):
+    # merge creates, updates and deletes into metadata
+    for fieldname, spec in fields.items():
+        if spec is None:
+            metadata['extra_fields'].pop(fieldname, None)
+            continue
+        if not isinstance(spec, dict):
+            spec = {'value': spec}
+        unknown = set(spec.keys()) - set(__FIELDSPEC_KEYS)
+        if unknown or 'value' not in spec:
+            raise RuntimeError('Wrong specification of extra field ' + fieldname)
+        spec = dict(spec)
+        if fieldname not in metadata['extra_fields'] and 'fieldtype' not in spec:
+            spec['fieldtype'] = __guess_field_type(spec['value'])
+        __set_field(metadata, fieldname, **spec)
+
+
+@_traced
+def set_extrafields(fields: dict, expid: int=None, session: Session=None):
+    """Create, update and delete several extra fields of an experiment
+    with a single request to the server.
+
+    Parameters
+    ----------
+    fields : dict
+        A dictionary mapping fieldnames to their new values. A value of
+        None deletes the field. Instead of a value, a dictionary can be
+        given with the key 'value' and optionally the keys 'fieldtype',
+        'unit', 'units', 'description', 'groupname', 'readonly' and 
+        'required' (see create_extrafield()). Missing fields are created;
+        if no fieldtype is given, it is derived from the type of the 
+        value (number, datetime-local, date, time or text).
+    expid : int, optional
+        The id of the experiment in eLabFTW to be modified.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
+
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+   
+    # fetch current experiment once and merge all changes locally, since
+    # the whole metadata is written back
+    exp = __get_experiment(session, expid, use_cache=False)
+    metadata = __load_metadata(exp)
+    _apply_extrafields(metadata, fields)
+
+    # save to elabftw
+    __patch_experiment(session, expid, body={'metadata': json.dumps(metadata)})
+
+
+class MetadataEditor:
+    """Local copy of the metadata of an experiment, which records all
+    changes of extra fields, as provided by edit_metadata().
+
+    Extra fields are read with editor[fieldname] (converted according
+    to their type, like get_extrafields()), set with
+    editor[fieldname] = value or editor.set(fieldname, value, ...) and
+    deleted with del editor[fieldname].
+
+    Parameters
+    ----------
+    expid : int
+        The id of the experiment.
+    exp : 
+        The experiment record the metadata is loaded from.
+
+    """
+
+    def __init__(self, expid: int, exp):
+        self.expid = expid
+        self.changes = {}
+        self._load(exp)
+
+    def _load(self, exp):
+        self.metadata = _loads_metadata(exp.metadata)
+        self.metadata.setdefault('extra_fields', {})
+        self._revision = (exp.modified_at, exp.metadata)
+        self._saved_fields = set(self.metadata['extra_fields'].keys())
+
+    def _rebase(self, exp):
+        # replay the recorded changes on a newer version of the metadata
+        self._load(exp)
+        _apply_extrafields(self.metadata, self.changes)
+
+    def _is_modified(self, exp):
+        return (exp.modified_at, exp.metadata) != self._revision
+
+    def _value_updates(self):
+        # if all changes are new values of existing fields, return them
+        # converted for the server, otherwise None
+        fields = self.metadata['extra_fields']
+        values = {}
+        for fieldname, spec in self.changes.items():
+            if spec is None or set(spec.keys()) != {'value'} \
+                    or fieldname not in self._saved_fields:
+                return None
+            values[fieldname] = fields[fieldname]['value']
+        return values
+
+    def _is_saved(self, exp):
+        # check that the recorded changes are contained in exp
+        fields = _loads_metadata(exp.metadata).get('extra_fields', {})
+        for fieldname, spec in self.changes.items():
+            if spec is None:
+                if fieldname in fields:
+                    return False
+            elif fields.get(fieldname, {}).get('value') != \
+                    self.metadata['extra_fields'][fieldname]['value']:
+                return False
+        return True
+
+    def __contains__(self, fieldname):
+        return fieldname in self.metadata['extra_fields']
+
+    def __iter__(self):
+        return iter(list(self.metadata['extra_fields']))
+
+    def __len__(self):
+        return len(self.metadata['extra_fields'])
+
+    def __getitem__(self, fieldname: str):
+        return _parse_field_value(self.metadata['extra_fields'][fieldname])
+
+    def __setitem__(self, fieldname: str, value):
+        self.set(fieldname, value)
+
+    def __delitem__(self, fieldname: str):
+        if fieldname not in self.metadata['extra_fields']:
+            raise KeyError(fieldname)
+        self._record(fieldname, None)
+
+    def set(self, fieldname: str, value, **spec):
+        """Create or update an extra field. The keyword arguments 
+        fieldtype, unit, units, description, groupname, readonly and 
+        required are optional (see set_extrafields())."""
+        self._record(fieldname, dict(spec, value=value))
+
+    def _record(self, fieldname: str, spec):
+        _apply_extrafields(self.metadata, {fieldname: spec})
+        previous = self.changes.pop(fieldname, None)
+        if spec is not None and previous is not None:
+            spec = dict(previous, **spec)
+        self.changes[fieldname] = spec
+
+
+@contextmanager
+def edit_metadata(expid: int=None, on_conflict: str='merge',
+                  max_retries: int=3, session: Session=None):
+    """Context manager for editing the extra fields of an experiment
+    in a single transaction:
+    
+        with edit_metadata(expid) as md:
+            md['voltage'] = 1.5
+            md.set('current', 0.1, unit='A')
+            del md['obsolete']
+    
+    The metadata is fetched once on entering; all changes are made 
+    locally and saved on leaving the block (nothing is saved if the
+    block raises an exception). Before saving, the experiment is fetched
+    again; if it was modified in the meantime (by comparing modified_at
+    and the metadata), the changes are replayed on the new metadata, so
+    that concurrent changes of other fields are not lost.
+    If only the values of existing fields were changed, they are saved 
+    with a single field update request, which does not affect other
+    fields. Otherwise, the whole metadata is saved and fetched again to
+    check that the changes were not overwritten by another client;
+    if they were, they are replayed and saved again (or a RuntimeError
+    is raised if on_conflict is 'raise'). As the eLabFTW api
+    offers no conditional updates, a write of the whole metadata by
+    another client arriving after this check can still overwrite the
+    changes.
+
+    Parameters
+    ----------
+    expid : int, optional
+        The id of the experiment in eLabFTW to be modified.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    on_conflict : str, optional
+        'merge': replay the changes on the modified metadata,
+        'raise': raise a RuntimeError if the experiment was modified
+        or the changes were overwritten.
+        The default is 'merge'.
+    max_retries : int, optional
+        The number of times the changes are saved again if they were
+        overwritten, before a RuntimeError is raised.
+        The default is 3.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Yields
+    ------
+    MetadataEditor
+        The local copy of the metadata.
+
+    """
+
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
+
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+    
+    if on_conflict not in ('merge', 'raise'):
+        raise RuntimeError('Wrong on_conflict')
+    
+    editor = MetadataEditor(expid, __get_experiment(session, expid,
+                                                    use_cache=False))
+    yield editor
+    if not editor.changes:
+        return
+    
+    # make sure the changes are based on the current metadata
+    exp = __get_experiment(session, expid, use_cache=False)
+    if editor._is_modified(exp):
+        if on_conflict == 'raise':
+            raise RuntimeError('Experiment was modified concurrently')
+        editor._rebase(exp)
+    
+    # new values of existing fields are merged by the server
+    values = editor._value_updates()
+    if values is not None:
+        body = {'action': 'updatemetadatafield'}
+        body.update(values)
+        __patch_experiment(session, expid, body=body)
+        return
+    
+    # save whole metadata, and again if it was overwritten concurrently
+    for attempt in range(max_retries + 1):
+        __patch_experiment(session, expid, body={'metadata': json.dumps(editor.metadata)})
+        exp = __get_experiment(session, expid, use_cache=False)
+        if editor._is_saved(exp):
+            return
+        if on_conflict == 'raise':
+            raise RuntimeError('Experiment was modified concurrently')
+        # back off randomly, so that competing clients do not collide again
+        time.sleep(random.uniform(0, 0.1 * 2**attempt))
+        editor._rebase(exp)
+    raise RuntimeError('Metadata was overwritten concurrently, '
+                       'changes not saved')
     
     
 ### Upload files ###
 
+
+def __post_upload(session: Session, expid: int, filename: str, data: bytes,
+                  comment: str, uploadid: int=None):
+    # post the data as multipart form, as UploadsApi.post_upload does
+    # after reading the file given by its path
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    path = '/{entity_type}/{id}/uploads'
+    path_params = {'entity_type': 'experiments', 'id': expid}
+    if uploadid is not None:
+        path += '/{subid}'
+        path_params['subid'] = uploadid
+    _, _, headers = session.api_client.call_api(
+        path, 'POST', path_params=path_params,
+        header_params={'Content-Type': 'multipart/form-data'},
+        post_params=[('comment', comment),
+                     ('file', (filename, data, mimetype))],
+        auth_settings=['token'])
+
+    # eLabFTW returns the location of the new upload, which allows
+    # to update a cached listing in place instead of fetching it again
+    location = headers.get('Location', '') if headers else ''
+    newid = location.rstrip('/').rsplit('/', 1)[-1]
+    newid = int(newid) if newid.isdigit() else None
+    index = session._uploadcache.get(expid)
+    if index is not None:
+        if newid is None:
+            session._uploadcache.invalidate(expid)
+        else:
+            if uploadid is not None:
+                index.remove(uploadid)
+            index.add(elabapi_python.Upload(id=newid, real_name=filename,
+                                            comment=comment,
+                                            filesize=len(data)))
+    return newid
+
         
+@_traced
 def upload_file(file: str, comment: str,
-                replacefile: bool=True, expid: int=None):
+                replacefile: bool=True, expid: int=None,
+                session: Session=None):
     """Upload an excisting file to an experiment on eLabFTW
     
     Parameters
@@ -845,6 +3696,10 @@ def upload_file(file: str, comment: str,
         should be uploaded.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -852,36 +3707,151 @@ def upload_file(file: str, comment: str,
 
     """
 
-    global __APICLIENT__
-    if __APICLIENT__ is None:
-        raise RuntimeError('Not connected to eLabFTW server')
-    uploads_api = elabapi_python.UploadsApi(__APICLIENT__)
-
+    session = __get_session(session)
     if expid is None:
-        global __EXPID__
-        expid = __EXPID__
+        expid = session.expid
 
     if expid is None:
         raise RuntimeError('No experiment opened or specified')
     
     if replacefile:
-        uploadid = __get_upload_id(expid, os.path.basename(file))
+        uploadid = __get_upload_id(session, expid, os.path.basename(file))
     else:
         uploadid = None
         
-    if uploadid is None:
-        uploads_api.post_upload('experiments', expid, 
-                                file=file, comment=comment)
+    with open(file, 'rb') as f:
+        data = f.read()
+    __post_upload(session, expid, os.path.basename(file), data, comment,
+                  uploadid)
+
+
+@_traced
+def upload_bytes(data: bytes, filename: str, comment: str,
+                 replacefile: bool=True, expid: int=None,
+                 session: Session=None):
+    """Upload binary data from memory as a file to an experiment on eLabFTW
+    
+    Parameters
+    ----------
+    data : bytes
+        The content of the file to be uploaded.
+    filename : str
+        The filename (with extension) under which the data is stored.
+    comment : str
+        A comment decribing the file.
+    replacefile : bool, optional
+        If True, an existing file with the same name will be overwritten.
+        The default is True.
+    expid : int, optional
+        The id of the experiment in eLabFTW into which the file
+        should be uploaded.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
+
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
+    
+    if replacefile:
+        uploadid = __get_upload_id(session, expid, filename)
     else:
-        uploads_api.post_upload_replace('experiments', expid, uploadid,
-                                        file=file, comment=comment)
+        uploadid = None
+
+    __post_upload(session, expid, filename, bytes(data), comment, uploadid)
+
+
+@_traced
+def upload_files_batch(files, comment, replacefile: bool=True,
+                       max_workers: int=8, expid: int=None,
+                       session: Session=None):
+    """Upload many existing files to an experiment on eLabFTW in parallel
+    
+    Parameters
+    ----------
+    files : list
+        A list of the names and paths of the files to be uploaded.
+    comment : str or dictionary
+        A comment decribing the files, or a dictionary with a comment
+        for each file in files.
+    replacefile : bool, optional
+        If True, existing files with the same names will be overwritten.
+        The default is True.
+    max_workers : int, optional
+        The maximum number of parallel uploads.
+        The default is 8.
+    expid : int, optional
+        The id of the experiment in eLabFTW into which the files
+        should be uploaded.
+        If None, the experiment specified by open_experiment() is used.
+        The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
+
+    Returns
+    -------
+    list
+        A list of dictionaries in the order of files with the keys
+        'file', 'uploadid' (the id of the new upload in eLabFTW), 
+        'replaced' (True if an existing file was replaced), 'duration'
+        (the time needed for the upload in seconds) and 'error' (the
+        exception raised or None if the upload succeeded).
+
+    """
+
+    session = __get_session(session)
+    if expid is None:
+        expid = session.expid
 
+    if expid is None:
+        raise RuntimeError('No experiment opened or specified')
 
+    # look up existing files once for all uploads
+    index = __get_upload_index(session, expid, use_cache=False) \
+        if replacefile else None
+
+    def upload(file):
+        start = time.perf_counter()
+        uploadid = None if index is None else index.find(os.path.basename(file))
+        result = {'file': file, 'uploadid': None,
+                  'replaced': uploadid is not None, 'duration': None,
+                  'error': None}
+        try:
+            with open(file, 'rb') as f:
+                data = f.read()
+            result['uploadid'] = __post_upload(
+                session, expid, os.path.basename(file), data,
+                comment.get(file, '') if isinstance(comment, dict) else comment,
+                uploadid)
+        except Exception as e:
+            result['error'] = e
+        result['duration'] = time.perf_counter() - start
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_in_span(upload), files))
+
+
+@_traced
 def upload_image_from_figure(fig: Figure, filename: str, comment: str,
                              replacefile: bool=True,
                              format: str='png', dpi='figure',
                              bbox_inches='tight',
-                             expid: int=None):
+                             expid: int=None, session: Session=None):
     """Generate image from matplotlib figure and upload it to
     an experiment on eLabFTW
     
@@ -907,6 +3877,10 @@ def upload_image_from_figure(fig: Figure, filename: str, comment: str,
         should be uploaded.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -914,18 +3888,18 @@ def upload_image_from_figure(fig: Figure, filename: str, comment: str,
 
     """
 
-    # create a temporary directory for the image, create it and upload
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpfile = os.path.join(tmpdir, 
-                               Path(filename).with_suffix('.' + format))
-        fig.savefig(tmpfile, format=format, facecolor='white', dpi=dpi,
-                    bbox_inches=bbox_inches)
-        upload_file(tmpfile, comment, replacefile, expid=expid)
+    # create the image in memory and upload
+    buffer = BytesIO()
+    fig.savefig(buffer, format=format, facecolor='white', dpi=dpi,
+                bbox_inches=bbox_inches)
+    upload_bytes(buffer.getvalue(), Path(filename).with_suffix('.' + format).name,
+                 comment, replacefile, expid=expid, session=session)
         
         
+@_traced
 def upload_csv_data(data, filename: str, comment: str,
                     replacefile: bool=True, index: bool=False,
-                    expid: int=None):
+                    expid: int=None, session: Session=None):
     """Generate a csv file from a pandas dataframe or a dictionary of
     numpy arrays (column data) and upload it to an experiment on eLabFTW
     
@@ -951,6 +3925,10 @@ def upload_csv_data(data, filename: str, comment: str,
         should be uploaded.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
 
     Returns
     -------
@@ -964,35 +3942,48 @@ def upload_csv_data(data, filename: str, comment: str,
     else:
         df = pd.DataFrame(data)
 
-    # create a temporary directory for the file, create it and upload
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpfile = os.path.join(tmpdir, filename)
-        df.to_csv(tmpfile, index=index)
-        upload_file(tmpfile, comment, replacefile, expid=expid)
+    # create the file in memory and upload
+    buffer = BytesIO()
+    df.to_csv(buffer, index=index)
+    upload_bytes(buffer.getvalue(), filename, comment, replacefile, expid=expid,
+                 session=session)
     
     
+def _get_app():
+    # the JupyterLab frontend is only created when it is needed, since
+    # importing ipylab is slow and it starts a widget comm
+    global __APP__
+    if __APP__ is None:
+        from ipylab import JupyterFrontEnd
+        __APP__ = JupyterFrontEnd()
+    return __APP__
+
+
 async def _callback_savenotebook():
-    await __APP__.ready()
+    app = _get_app()
+    await app.ready()
 
     # save current notebook
     print('Saving file ...')
-    __APP__.commands.execute('docmanager:save')
+    app.commands.execute('docmanager:save')
 
 
-async def _callback_upload(comment: str, replacefile: bool, expid: int):
-    await __APP__.ready()
+async def _callback_upload(comment: str, replacefile: bool, expid: int,
+                           session: Session):
+    app = _get_app()
+    await app.ready()
 
     # get filename of the current notebook
-    file = os.path.join(os.getcwd(), __APP__.sessions.current_session['name'])
+    file = os.path.join(os.getcwd(), app.sessions.current_session['name'])
     print(file)
     # upload to elabftw
     print('Uploading to eLabFTW ...')
-    upload_file(file, comment, replacefile, expid=expid)
+    upload_file(file, comment, replacefile, expid=expid, session=session)
     print('Done.')
 
 
 def upload_this_jupyternotebook(comment: str, replacefile: bool=True,
-                                expid: int=None):
+                                expid: int=None, session: Session=None):
     """Saves and uploads the current jupyter notebook
     to an experiment on eLabFTW
     
@@ -1008,6 +3999,10 @@ def upload_this_jupyternotebook(comment: str, replacefile: bool=True,
         should be uploaded.
         If None, the experiment specified by open_experiment() is used.
         The default is None.
+    session : Session, optional
+        The session used to access eLabFTW.
+        If None, the session established by connect() is used.
+        The default is None.
         
     Returns
     -------
@@ -1017,5 +4012,86 @@ def upload_this_jupyternotebook(comment: str, replacefile: bool=True,
 
     # start async tasks to save and upload notebook
     asyncio.gather(_callback_savenotebook(), 
-                   _callback_upload(comment, replacefile, expid))
-
+                   _callback_upload(comment, replacefile, expid, session))
+
+
+### Methods of sessions and experiments ###
+
+
+def __session_method(func):
+    # method of Session calling func with this session
+    @functools.wraps(func)
+    def method(self, *args, **kwargs):
+        return func(*args, session=self, **kwargs)
+    method.__doc__ = ('Method version of pyelabdata.' + func.__name__
+                      + '() using this session.\n' + (func.__doc__ or ''))
+    return method
+
+
+def __experiment_method(func):
+    # method of Experiment calling func with this experiment and its session
+    @functools.wraps(func)
+    def method(self, *args, **kwargs):
+        return func(*args, expid=self.id, session=self.session, **kwargs)
+    method.__doc__ = ('Method version of pyelabdata.' + func.__name__
+                      + '() for this experiment.\n' + (func.__doc__ or ''))
+    return method
+
+
+Session.iter_experiments = __session_method(iter_experiments)
+Session.list_experiments = __session_method(list_experiments)
+Session.open_experiment = __session_method(open_experiment)
+Session.close_experiment = __session_method(close_experiment)
+Session.get_experimentdata = __session_method(get_experimentdata)
+Session.get_maintext = __session_method(get_maintext)
+Session.get_table_data = __session_method(get_table_data)
+Session.get_all_tables = __session_method(get_all_tables)
+Session.list_tables = __session_method(list_tables)
+Session.get_extrafields = __session_method(get_extrafields)
+Session.get_extrafield_schema = __session_method(get_extrafield_schema)
+Session.extrafields_table = __session_method(extrafields_table)
+Session.get_file_data = __session_method(get_file_data)
+Session.open_file_stream = __session_method(open_file_stream)
+Session.iter_file_chunks = __session_method(iter_file_chunks)
+Session.get_file_to_path = __session_method(get_file_to_path)
+Session.get_file_csv_data = __session_method(get_file_csv_data)
+Session.iter_file_csv_chunks = __session_method(iter_file_csv_chunks)
+Session.get_file_hdf5_data = __session_method(get_file_hdf5_data)
+Session.get_files_batch = __session_method(get_files_batch)
+Session.create_extrafield = __session_method(create_extrafield)
+Session.update_extrafield = __session_method(update_extrafield)
+Session.delete_extrafield = __session_method(delete_extrafield)
+Session.set_extrafields = __session_method(set_extrafields)
+Session.edit_metadata = __session_method(edit_metadata)
+Session.upload_file = __session_method(upload_file)
+Session.upload_bytes = __session_method(upload_bytes)
+Session.upload_files_batch = __session_method(upload_files_batch)
+Session.upload_image_from_figure = __session_method(upload_image_from_figure)
+Session.upload_csv_data = __session_method(upload_csv_data)
+Session.upload_this_jupyternotebook = __session_method(upload_this_jupyternotebook)
+
+Experiment.get_experimentdata = __experiment_method(get_experimentdata)
+Experiment.get_maintext = __experiment_method(get_maintext)
+Experiment.get_table_data = __experiment_method(get_table_data)
+Experiment.get_all_tables = __experiment_method(get_all_tables)
+Experiment.list_tables = __experiment_method(list_tables)
+Experiment.get_extrafields = __experiment_method(get_extrafields)
+Experiment.get_extrafield_schema = __experiment_method(get_extrafield_schema)
+Experiment.get_file_data = __experiment_method(get_file_data)
+Experiment.open_file_stream = __experiment_method(open_file_stream)
+Experiment.iter_file_chunks = __experiment_method(iter_file_chunks)
+Experiment.get_file_to_path = __experiment_method(get_file_to_path)
+Experiment.get_file_csv_data = __experiment_method(get_file_csv_data)
+Experiment.iter_file_csv_chunks = __experiment_method(iter_file_csv_chunks)
+Experiment.get_file_hdf5_data = __experiment_method(get_file_hdf5_data)
+Experiment.create_extrafield = __experiment_method(create_extrafield)
+Experiment.update_extrafield = __experiment_method(update_extrafield)
+Experiment.delete_extrafield = __experiment_method(delete_extrafield)
+Experiment.set_extrafields = __experiment_method(set_extrafields)
+Experiment.edit_metadata = __experiment_method(edit_metadata)
+Experiment.upload_file = __experiment_method(upload_file)
+Experiment.upload_bytes = __experiment_method(upload_bytes)
+Experiment.upload_files_batch = __experiment_method(upload_files_batch)
+Experiment.upload_image_from_figure = __experiment_method(upload_image_from_figure)
+Experiment.upload_csv_data = __experiment_method(upload_csv_data)
+Experiment.upload_this_jupyternotebook = __experiment_method(upload_this_jupyternotebook)